@@ -0,0 +1,16 @@
+-- Create stream_sessions table for completed stream sessions
+-- One row per stream, written in batches by the StreamManager cog
+CREATE TABLE IF NOT EXISTS stream_sessions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(), -- generated by the bot so batch retries are idempotent
+    user_id BIGINT NOT NULL,
+    guild_id BIGINT,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    ended_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    duration_seconds INTEGER NOT NULL,
+    source TEXT NOT NULL, -- how the stream was detected (presence, twitch, ...)
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Create indexes for streaming-hours stats per user and per guild
+CREATE INDEX IF NOT EXISTS idx_stream_sessions_user_id ON stream_sessions(user_id, started_at);
+CREATE INDEX IF NOT EXISTS idx_stream_sessions_guild_id ON stream_sessions(guild_id, started_at);
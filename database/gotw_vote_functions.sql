@@ -0,0 +1,52 @@
+-- Vote functions for the GOTW poll tallies
+-- Run this in your Supabase SQL editor after setup_gotw_tables_simple.sql
+
+-- Vote counts per team for every poll without a declared winner, counted in
+-- the database so the bot never downloads individual vote rows to seed or
+-- reconcile its in-memory tallies.
+CREATE OR REPLACE FUNCTION get_open_poll_vote_counts()
+RETURNS TABLE (
+    poll_id VARCHAR(255),
+    team_abbr VARCHAR(3),
+    votes BIGINT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT v.poll_id, v.team_abbr, COUNT(*)
+    FROM gotw_votes v
+    JOIN gotw_polls p ON p.id = v.poll_id
+    WHERE NOT COALESCE(p.winner_declared, FALSE)
+    GROUP BY v.poll_id, v.team_abbr;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Record (or change) a user's vote in one call.
+-- Returns the team the user had voted for before, or NULL for a first vote,
+-- so the bot can move the vote between its in-memory counters.
+CREATE OR REPLACE FUNCTION record_gotw_vote(
+    poll_id_param VARCHAR(255),
+    user_id_param BIGINT,
+    team_abbr_param VARCHAR(3)
+)
+RETURNS VARCHAR(3) AS $$
+DECLARE
+    v_previous VARCHAR(3);
+BEGIN
+    -- Lock and read the previous vote before the upsert replaces it
+    SELECT v.team_abbr INTO v_previous
+    FROM gotw_votes v
+    WHERE v.poll_id = poll_id_param AND v.user_id = user_id_param
+    FOR UPDATE;
+
+    INSERT INTO gotw_votes AS v (poll_id, user_id, team_abbr, voted_at)
+    VALUES (poll_id_param, user_id_param, team_abbr_param, NOW())
+    ON CONFLICT (poll_id, user_id) DO UPDATE
+    SET team_abbr = EXCLUDED.team_abbr,
+        voted_at = EXCLUDED.voted_at;
+
+    RETURN v_previous;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION get_open_poll_vote_counts() TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION record_gotw_vote(VARCHAR, BIGINT, VARCHAR) TO anon, authenticated;
@@ -0,0 +1,200 @@
+-- Atomic point functions for the users table
+-- Run this in your Supabase SQL editor after schema.sql
+--
+-- These replace the bot's old read-then-upsert pattern, which took two round
+-- trips and let concurrent awards overwrite each other.
+
+-- Add (or subtract, with a negative delta) points in a single statement.
+-- Totals never drop below zero. Unknown users are created on the fly.
+-- Returns the total before and after the change.
+CREATE OR REPLACE FUNCTION increment_user_points(
+    user_id_param BIGINT,
+    delta_param INTEGER,
+    display_name_param TEXT DEFAULT NULL,
+    username_param TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    old_points INTEGER,
+    new_points INTEGER
+) AS $$
+DECLARE
+    v_old INTEGER;
+    v_new INTEGER;
+BEGIN
+    -- Lock and read the old total in its own statement; WITH sub-statements
+    -- share one snapshot, so a sibling CTE can't see the row before the upsert
+    SELECT u.total_points INTO v_old
+    FROM users u
+    WHERE u.id = user_id_param
+    FOR UPDATE;
+
+    INSERT INTO users AS u (id, display_name, username, total_points, stream_points, other_points)
+    VALUES (user_id_param, display_name_param, username_param, GREATEST(0, delta_param), 0, 0)
+    ON CONFLICT (id) DO UPDATE
+    SET total_points = GREATEST(0, COALESCE(u.total_points, 0) + delta_param),
+        display_name = COALESCE(EXCLUDED.display_name, u.display_name),
+        username = COALESCE(EXCLUDED.username, u.username)
+    RETURNING u.total_points INTO v_new;
+
+    RETURN QUERY SELECT COALESCE(v_old, 0), v_new;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION increment_user_points(BIGINT, INTEGER, TEXT, TEXT) TO anon, authenticated;
+
+-- Apply the same point change to many users in one call (bulk /addpoints and
+-- /removepoints). The name arrays line up with user_ids_param and may be NULL.
+-- Returns one row per distinct user with the totals before and after.
+CREATE OR REPLACE FUNCTION increment_users_points(
+    user_ids_param BIGINT[],
+    delta_param INTEGER,
+    display_names_param TEXT[] DEFAULT NULL,
+    usernames_param TEXT[] DEFAULT NULL
+)
+RETURNS TABLE (
+    user_id BIGINT,
+    old_points INTEGER,
+    new_points INTEGER
+) AS $$
+DECLARE
+    v_old_ids BIGINT[];
+    v_old_points INTEGER[];
+BEGIN
+    -- Lock (in id order) and read the old totals before writing anything
+    SELECT array_agg(locked.id), array_agg(locked.total_points)
+    INTO v_old_ids, v_old_points
+    FROM (
+        SELECT u.id, u.total_points
+        FROM users u
+        WHERE u.id = ANY(user_ids_param)
+        ORDER BY u.id
+        FOR UPDATE
+    ) locked;
+
+    RETURN QUERY
+    WITH targets AS (
+        SELECT DISTINCT ON (t.id) t.id, t.display_name, t.username
+        FROM unnest(user_ids_param, display_names_param, usernames_param) AS t(id, display_name, username)
+        WHERE t.id IS NOT NULL
+    ),
+    updated AS (
+        INSERT INTO users AS u (id, display_name, username, total_points, stream_points, other_points)
+        SELECT t.id, t.display_name, t.username, GREATEST(0, delta_param), 0, 0
+        FROM targets t
+        ON CONFLICT (id) DO UPDATE
+        SET total_points = GREATEST(0, COALESCE(u.total_points, 0) + delta_param),
+            display_name = COALESCE(EXCLUDED.display_name, u.display_name),
+            username = COALESCE(EXCLUDED.username, u.username)
+        RETURNING u.id, u.total_points
+    )
+    SELECT up.id, COALESCE(p.total_points, 0), up.total_points
+    FROM updated up
+    LEFT JOIN unnest(v_old_ids, v_old_points) AS p(id, total_points) ON p.id = up.id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reset many users' totals to zero in one call (/clearpoints).
+-- Returns one row per distinct user with the totals before and after.
+CREATE OR REPLACE FUNCTION clear_users_points(
+    user_ids_param BIGINT[],
+    display_names_param TEXT[] DEFAULT NULL,
+    usernames_param TEXT[] DEFAULT NULL
+)
+RETURNS TABLE (
+    user_id BIGINT,
+    old_points INTEGER,
+    new_points INTEGER
+) AS $$
+DECLARE
+    v_old_ids BIGINT[];
+    v_old_points INTEGER[];
+BEGIN
+    -- Lock (in id order) and read the old totals before writing anything
+    SELECT array_agg(locked.id), array_agg(locked.total_points)
+    INTO v_old_ids, v_old_points
+    FROM (
+        SELECT u.id, u.total_points
+        FROM users u
+        WHERE u.id = ANY(user_ids_param)
+        ORDER BY u.id
+        FOR UPDATE
+    ) locked;
+
+    RETURN QUERY
+    WITH targets AS (
+        SELECT DISTINCT ON (t.id) t.id, t.display_name, t.username
+        FROM unnest(user_ids_param, display_names_param, usernames_param) AS t(id, display_name, username)
+        WHERE t.id IS NOT NULL
+    ),
+    updated AS (
+        INSERT INTO users AS u (id, display_name, username, total_points, stream_points, other_points)
+        SELECT t.id, t.display_name, t.username, 0, 0, 0
+        FROM targets t
+        ON CONFLICT (id) DO UPDATE
+        SET total_points = 0,
+            display_name = COALESCE(EXCLUDED.display_name, u.display_name),
+            username = COALESCE(EXCLUDED.username, u.username)
+        RETURNING u.id, u.total_points
+    )
+    SELECT up.id, COALESCE(p.total_points, 0), up.total_points
+    FROM updated up
+    LEFT JOIN unnest(v_old_ids, v_old_points) AS p(id, total_points) ON p.id = up.id;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION increment_users_points(BIGINT[], INTEGER, TEXT[], TEXT[]) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION clear_users_points(BIGINT[], TEXT[], TEXT[]) TO anon, authenticated;
+
+-- Award stream points, capping stream_points at cap_param (NULL means no cap,
+-- used by /addstreampoint corrections). total_points grows by however many
+-- stream points were actually added. Unknown users are created on the fly.
+-- Returns the points added and the new stream and total points.
+CREATE OR REPLACE FUNCTION award_stream_points(
+    user_id_param BIGINT,
+    points_param INTEGER,
+    cap_param INTEGER DEFAULT 8,
+    display_name_param TEXT DEFAULT NULL,
+    username_param TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    points_added INTEGER,
+    stream_points INTEGER,
+    total_points INTEGER
+) AS $$
+DECLARE
+    v_old INTEGER;
+    v_stream INTEGER;
+    v_total INTEGER;
+BEGIN
+    -- Lock and read the old stream points before the upsert changes them
+    SELECT u.stream_points INTO v_old
+    FROM users u
+    WHERE u.id = user_id_param
+    FOR UPDATE;
+
+    INSERT INTO users AS u (id, display_name, username, total_points, stream_points, other_points)
+    VALUES (
+        user_id_param, display_name_param, username_param,
+        LEAST(points_param, COALESCE(cap_param, points_param)),
+        LEAST(points_param, COALESCE(cap_param, points_param)),
+        0
+    )
+    ON CONFLICT (id) DO UPDATE
+    SET stream_points = GREATEST(
+            COALESCE(u.stream_points, 0),
+            LEAST(COALESCE(u.stream_points, 0) + points_param, COALESCE(cap_param, COALESCE(u.stream_points, 0) + points_param))
+        ),
+        total_points = COALESCE(u.total_points, 0) + GREATEST(
+            0,
+            LEAST(COALESCE(u.stream_points, 0) + points_param, COALESCE(cap_param, COALESCE(u.stream_points, 0) + points_param))
+                - COALESCE(u.stream_points, 0)
+        ),
+        display_name = COALESCE(EXCLUDED.display_name, u.display_name),
+        username = COALESCE(EXCLUDED.username, u.username)
+    RETURNING u.stream_points, u.total_points INTO v_stream, v_total;
+
+    RETURN QUERY SELECT v_stream - COALESCE(v_old, 0), v_stream, v_total;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION award_stream_points(BIGINT, INTEGER, INTEGER, TEXT, TEXT) TO anon, authenticated;
@@ -2,7 +2,11 @@ import discord
 from discord.ext import commands
 import asyncio
 import logging
+import signal
 from config.settings import DISCORD_TOKEN
+from config.supabase_config import supabase
+from utils.guild_settings import GuildSettings
+from utils.supabase_repository import SupabaseRepository
 
 # Set up more detailed logging
 logging.basicConfig(
@@ -24,6 +28,12 @@ class MaddenBot(commands.Bot):
             intents=intents,
             description='Madden NFL Companion Bot'
         )
+        
+        # One Supabase client and query pool shared by every cog
+        self.db = SupabaseRepository(supabase) if supabase else None
+        
+        # Per-guild settings (stream channel, roles) shared by every cog
+        self.settings = GuildSettings(self.db)
     
     async def setup_hook(self):
         """This is called when the bot starts up"""
@@ -116,6 +126,12 @@ class MaddenBot(commands.Bot):
         for guild in self.guilds:
             print(f"  - {guild.name} (ID: {guild.id})")
         
+        # Refresh every guild's settings in one query
+        try:
+            await self.settings.load_guilds([guild.id for guild in self.guilds])
+        except Exception as e:
+            print(f"❌ Failed to load guild settings: {e}")
+        
         # Perform per-guild sync so new/updated slash commands appear instantly
         try:
             for guild in self.guilds:
@@ -134,6 +150,12 @@ class MaddenBot(commands.Bot):
         for cmd in self.tree.get_commands():
             print(f"  - /{cmd.name}")
     
+    async def close(self):
+        """Release shared resources when the bot shuts down"""
+        await super().close()
+        if self.db:
+            self.db.close()
+    
     async def on_error(self, event, *args, **kwargs):
         print(f"❌ An error occurred in {event}")
         import traceback
@@ -142,9 +164,28 @@ class MaddenBot(commands.Bot):
 # Create bot instance
 bot = MaddenBot()
 
+async def main():
+    """Run the bot, closing it cleanly on SIGTERM/SIGINT so cogs flush pending writes"""
+    shutdown_tasks = set()
+    
+    def request_shutdown():
+        task = asyncio.create_task(bot.close())
+        shutdown_tasks.add(task)
+        task.add_done_callback(shutdown_tasks.discard)
+    
+    async with bot:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, request_shutdown)
+            except NotImplementedError:
+                # Windows event loops don't support signal handlers
+                pass
+        await bot.start(DISCORD_TOKEN)
+
 if __name__ == '__main__':
     if not DISCORD_TOKEN:
         print("❌ DISCORD_TOKEN not found in .env file!")
     else:
         print("🚀 Starting bot...")
-        bot.run(DISCORD_TOKEN)
+        asyncio.run(main())
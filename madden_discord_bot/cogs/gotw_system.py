@@ -1,12 +1,16 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import json
 import os
 import asyncio
 import logging
+import time
 from datetime import datetime
-from supabase import create_client, Client
+from utils.cache import TTLCache
+from utils.poll_tallies import PollTallies
+from utils.supabase_repository import is_missing_function
+from config.settings import GOTW_MESSAGE_EDIT_INTERVAL, GOTW_RPC_PROBE_INTERVAL
 
 logger = logging.getLogger(__name__)
 
@@ -16,25 +20,123 @@ class GOTWSystem(commands.Cog):
         self.teams_file = "data/nfl_teams.json"
         self.teams = {}
         
-        # Initialize Supabase client
-        try:
-            supabase_url = os.getenv('SUPABASE_URL')
-            supabase_key = os.getenv('SUPABASE_ANON_KEY')
-            if supabase_url and supabase_key:
-                self.supabase: Client = create_client(supabase_url, supabase_key)
-                logger.info("✅ Supabase client initialized for GOTW system")
-            else:
-                logger.error("❌ Supabase credentials not found")
-                self.supabase = None
-        except Exception as e:
-            logger.error(f"❌ Error initializing Supabase client: {e}")
-            self.supabase = None
+        # Shared Supabase repository (created once by the bot)
+        self.db = bot.db
+        if self.db:
+            logger.info("✅ Supabase client initialized for GOTW system")
+        else:
+            logger.error("❌ Supabase credentials not found")
+        
+        # Poll rows keyed by ID; lock/winner changes made here are written through
+        self.POLL_CACHE_TTL = 3600  # 1 hour in seconds
+        self.poll_cache = TTLCache(maxsize=256, ttl=self.POLL_CACHE_TTL)
+        
+        # Live vote counts for open polls, seeded at startup and reconciled periodically
+        self.poll_tallies = PollTallies()
+        
+        # Poll card edits are coalesced per poll so vote bursts stay under the edit rate limit
+        self.MESSAGE_EDIT_INTERVAL = GOTW_MESSAGE_EDIT_INTERVAL
+        self.dirty_poll_messages = {}  # {poll_id: message awaiting a refresh}
+        self.poll_message_tasks = {}  # {poll_id: asyncio.Task}
+        self.last_poll_message_edit = {}  # {poll_id: monotonic time of last edit}
+        
+        # Polls whose buttons are registered with the bot as persistent views
+        self.registered_poll_views = set()
+        
+        # Optional database functions, probed at load so calls skip straight to a working path
+        self.RPC_PROBE_INTERVAL = GOTW_RPC_PROBE_INTERVAL
+        self.PROBED_RPCS = {
+            "get_poll_with_votes": {"poll_id_param": ""},
+            "get_open_poll_vote_counts": {}
+        }
+        self.rpc_probe_task = None  # one-off startup probe when periodic probing is off
         
         # Load teams data
         self.load_teams()
         
         logger.info(f"✅ GOTWSystemSupabase cog initialized")
     
+    async def cog_load(self):
+        """Seed open poll tallies, probe optional RPCs and start periodic reconciliation"""
+        if self.db:
+            self.reconcile_polls.start()
+            if self.RPC_PROBE_INTERVAL > 0:
+                self.probe_rpcs.change_interval(seconds=self.RPC_PROBE_INTERVAL)
+                self.probe_rpcs.start()
+            else:
+                self.rpc_probe_task = asyncio.create_task(self.run_rpc_probes())
+    
+    def register_poll_views(self, polls):
+        """Re-attach button handlers to open poll cards posted before a restart (locked polls included)"""
+        registered = 0
+        for poll in polls:
+            if poll['id'] in self.registered_poll_views:
+                continue
+            team1 = self.teams.get(poll['team1_abbr']) or {'abbreviation': poll['team1_abbr'], 'name': poll['team1_name']}
+            team2 = self.teams.get(poll['team2_abbr']) or {'abbreviation': poll['team2_abbr'], 'name': poll['team2_name']}
+            self.bot.add_view(GOTWView(self, team1, team2, poll['id']), message_id=poll.get('message_id'))
+            self.registered_poll_views.add(poll['id'])
+            registered += 1
+        if registered:
+            logger.info(f"Registered persistent views for {registered} GOTW poll(s)")
+    
+    async def cog_unload(self):
+        """Stop background tasks when the cog is unloaded"""
+        self.reconcile_polls.cancel()
+        self.probe_rpcs.cancel()
+        if self.rpc_probe_task:
+            self.rpc_probe_task.cancel()
+        for task in self.poll_message_tasks.values():
+            task.cancel()
+    
+    @tasks.loop(minutes=10)
+    async def reconcile_polls(self):
+        """Reload open polls and their per-team vote counts to catch out-of-band changes"""
+        try:
+            started_at = time.monotonic()
+            polls = await self.db.get_open_polls()
+            for poll in polls:
+                self.poll_cache.set(poll['id'], poll)
+            self.register_poll_views(polls)
+            
+            # Counted by the database, so no vote rows are downloaded
+            if self.db.rpc_available.get("get_open_poll_vote_counts") is False:
+                return
+            counts = await self.db.get_open_poll_vote_counts()
+            self.poll_tallies.load([poll['id'] for poll in polls], counts, started_at=started_at)
+            logger.info(f"GOTW tallies reconciled: {len(self.poll_tallies)} open poll(s)")
+        except Exception as e:
+            logger.error(f"Error reconciling GOTW tallies: {e}")
+    
+    @tasks.loop(hours=1)
+    async def probe_rpcs(self):
+        """Periodically re-check which optional RPCs are deployed"""
+        await self.run_rpc_probes()
+    
+    async def run_rpc_probes(self):
+        """Probe every optional RPC, returning {function_name: True/False/None}"""
+        results = {}
+        for function_name, params in self.PROBED_RPCS.items():
+            results[function_name] = await self.db.probe_rpc(function_name, params)
+        return results
+    
+    @app_commands.command(name="gotwprobe", description="Re-check which GOTW database functions are available")
+    async def gotwprobe(self, interaction: discord.Interaction):
+        """Re-probe optional RPCs on demand (e.g. after deploying point_functions.sql)"""
+        if not interaction.user.guild_permissions.manage_messages:
+            await interaction.response.send_message("❌ You don't have permission to probe database functions.", ephemeral=True)
+            return
+        
+        if not self.db:
+            await interaction.response.send_message("❌ Database connection not available.", ephemeral=True)
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        results = await self.run_rpc_probes()
+        status = {True: "✅ available", False: "❌ not deployed", None: "⚠️ probe failed"}
+        lines = [f"`{function_name}`: {status[available]}" for function_name, available in results.items()]
+        await interaction.followup.send("\n".join(lines), ephemeral=True)
+    
     @app_commands.command(name="gotw", description="Create a Game of the Week poll")
     @app_commands.describe(team1="First team", team2="Second team")
     async def gotw(self, interaction: discord.Interaction, team1: str, team2: str):
@@ -114,7 +216,7 @@ class GOTWSystem(commands.Cog):
 
     async def create_poll(self, interaction: discord.Interaction, team1_abbr: str, team2_abbr: str):
         """Create a new GOTW poll in the database"""
-        if not self.supabase:
+        if not self.db:
             await interaction.response.send_message("❌ Database connection not available.", ephemeral=True)
             return
         
@@ -125,8 +227,8 @@ class GOTWSystem(commands.Cog):
             
             if not team1 or not team2:
                 await interaction.response.send_message("❌ Invalid team selection.", ephemeral=True)
-            return
-        
+                return
+            
             # Generate unique poll ID
             poll_id = f"{interaction.user.id}_{int(datetime.now().timestamp())}"
             
@@ -139,14 +241,16 @@ class GOTWSystem(commands.Cog):
                 'team2_abbr': team2_abbr,
                 'channel_id': interaction.channel.id,
                 'guild_id': interaction.guild.id,
-            'created_by': interaction.user.id,
+                'created_by': interaction.user.id,
                 'is_locked': False,
                 'winner_declared': False
             }
             
-            result = await self.supabase.table('gotw_polls').insert(poll_data).execute()
+            poll = await self.db.insert_poll(poll_data)
             
-            if result.data:
+            if poll:
+                self.poll_cache.set(poll_id, poll)
+                self.poll_tallies.track(poll_id)
                 logger.info(f"Created poll {poll_id}: {team1['name']} vs {team2['name']}")
                 await self.show_gotw_card(interaction, team1, team2, poll_id)
             else:
@@ -185,9 +289,11 @@ class GOTWSystem(commands.Cog):
             view = GOTWView(self, team1, team2, poll_id)
             
             # Send message
-            message = await interaction.response.send_message(embed=embed, view=view)
+            await interaction.response.send_message(embed=embed, view=view)
+            self.registered_poll_views.add(poll_id)
             
             # Update poll with message ID
+            message = await interaction.original_response()
             await self.update_poll_message_id(poll_id, message.id)
             
         except Exception as e:
@@ -197,28 +303,40 @@ class GOTWSystem(commands.Cog):
     async def update_poll_message_id(self, poll_id: str, message_id: int):
         """Update poll with Discord message ID"""
         try:
-            await self.supabase.table('gotw_polls').update({
-                'message_id': message_id
-            }).eq('id', poll_id).execute()
+            await self.update_poll(poll_id, {'message_id': message_id})
         except Exception as e:
             logger.error(f"Error updating poll message ID: {e}")
+    
+    async def get_cached_poll(self, poll_id: str):
+        """Return a poll row from memory, loading it from the database on a miss"""
+        poll = self.poll_cache.get(poll_id)
+        if poll is None:
+            poll = await self.db.get_poll(poll_id)
+            if poll:
+                self.poll_cache.set(poll_id, poll)
+        return poll
+    
+    async def update_poll(self, poll_id: str, changes: dict):
+        """Write poll changes to the database and the poll cache"""
+        await self.db.update_poll(poll_id, changes)
+        poll = self.poll_cache.get(poll_id)
+        if poll is not None:
+            poll.update(changes)
 
     async def handle_vote(self, interaction: discord.Interaction, team_abbr: str, poll_id: str):
         """Handle a vote for a specific team"""
-        if not self.supabase:
+        if not self.db:
             await interaction.response.send_message("❌ Database connection not available.", ephemeral=True)
             return
         
         try:
             # Check if poll exists and is not locked
-            poll_result = await self.supabase.table('gotw_polls').select('*').eq('id', poll_id).execute()
+            poll_data = await self.get_cached_poll(poll_id)
             
-            if not poll_result.data:
+            if not poll_data:
                 await interaction.response.send_message("❌ Poll not found.", ephemeral=True)
                 return
             
-            poll_data = poll_result.data[0]
-            
             if poll_data['is_locked']:
                 await interaction.response.send_message("❌ This poll is locked.", ephemeral=True)
                 return
@@ -227,17 +345,8 @@ class GOTWSystem(commands.Cog):
                 await interaction.response.send_message("❌ This poll has already been completed.", ephemeral=True)
                 return
             
-            # Remove existing vote for this user
-            await self.supabase.table('gotw_votes').delete().eq('poll_id', poll_id).eq('user_id', interaction.user.id).execute()
-            
-            # Add new vote
-            vote_data = {
-                'poll_id': poll_id,
-                'user_id': interaction.user.id,
-                'team_abbr': team_abbr
-            }
-            
-            await self.supabase.table('gotw_votes').insert(vote_data).execute()
+            # Record the vote, replacing any earlier vote by this user
+            await self.record_vote(poll_id, interaction.user.id, team_abbr)
             
             # Get team name for confirmation
             team_name = poll_data['team1_name'] if team_abbr == poll_data['team1_abbr'] else poll_data['team2_name']
@@ -245,58 +354,45 @@ class GOTWSystem(commands.Cog):
             await interaction.response.send_message(f"✅ Vote recorded for {team_name}!", ephemeral=True)
             
             # Update the message with new vote counts
-            await self.update_vote_message(interaction.message, poll_id)
+            self.schedule_vote_message_update(interaction.message, poll_id)
             
         except Exception as e:
             logger.error(f"Error handling vote: {e}")
             await interaction.response.send_message("❌ Error recording vote. Please try again.", ephemeral=True)
 
+    async def record_vote(self, poll_id: str, user_id: int, team_abbr: str):
+        """Store a vote and move it between the poll's in-memory counters"""
+        if self.db.rpc_available.get("record_gotw_vote") is not False:
+            try:
+                previous_team = await self.db.record_vote(poll_id, user_id, team_abbr)
+                self.poll_tallies.record(poll_id, team_abbr, previous_team)
+                return
+            except Exception as e:
+                if not is_missing_function(e):
+                    raise
+                self.db.rpc_available["record_gotw_vote"] = False
+                logger.warning(f"record_gotw_vote function missing, using plain upsert: {e}")
+        
+        # Without the function the previous vote is unknown, so this poll's results come from the database
+        await self.db.upsert_vote({
+            'poll_id': poll_id,
+            'user_id': user_id,
+            'team_abbr': team_abbr,
+            'voted_at': datetime.now().isoformat()
+        })
+        self.poll_tallies.discard(poll_id)
+    
     async def show_results(self, interaction: discord.Interaction, poll_id: str):
         """Show poll results"""
-        if not self.supabase:
+        if not self.db:
             await interaction.response.send_message("❌ Database connection not available.", ephemeral=True)
             return
         
         try:
-            # Try to get poll data with vote counts using the function
-            try:
-                result = await self.supabase.rpc('get_poll_with_votes', {'poll_id_param': poll_id}).execute()
-                if result.data:
-                    poll_data = result.data[0]
-                else:
-                    raise Exception("No data returned from function")
-            except Exception as e:
-                # Fallback to manual query if function doesn't exist
-                logger.warning(f"get_poll_with_votes function failed, using fallback: {e}")
-                
-                # Get poll data
-                poll_result = await self.supabase.table('gotw_polls').select('*').eq('id', poll_id).execute()
-                if not poll_result.data:
-                    await interaction.response.send_message("❌ Poll not found.", ephemeral=True)
-                    return
-                
-                poll_info = poll_result.data[0]
-                
-                # Get vote counts manually
-                votes_result = await self.supabase.table('gotw_votes').select('team_abbr').eq('poll_id', poll_id).execute()
-                
-                team1_votes = len([v for v in votes_result.data if v['team_abbr'] == poll_info['team1_abbr']])
-                team2_votes = len([v for v in votes_result.data if v['team_abbr'] == poll_info['team2_abbr']])
-                total_votes = len(votes_result.data)
-                
-                # Create poll_data structure
-                poll_data = {
-                    'team1_name': poll_info['team1_name'],
-                    'team1_abbr': poll_info['team1_abbr'],
-                    'team2_name': poll_info['team2_name'],
-                    'team2_abbr': poll_info['team2_abbr'],
-                    'is_locked': poll_info['is_locked'],
-                    'winner_declared': poll_info['winner_declared'],
-                    'winner_team': poll_info['winner_team'],
-                    'team1_votes': team1_votes,
-                    'team2_votes': team2_votes,
-                    'total_votes': total_votes
-                }
+            poll_data = await self.get_poll_results(poll_id)
+            if not poll_data:
+                await interaction.response.send_message("❌ Poll not found.", ephemeral=True)
+                return
             
             # Create results embed
             embed = discord.Embed(
@@ -344,31 +440,29 @@ class GOTWSystem(commands.Cog):
             await interaction.response.send_message("❌ You don't have permission to lock polls.", ephemeral=True)
             return
         
-        if not self.supabase:
+        if not self.db:
             await interaction.response.send_message("❌ Database connection not available.", ephemeral=True)
             return
         
         try:
             # Get current lock status
-            poll_result = await self.supabase.table('gotw_polls').select('is_locked').eq('id', poll_id).execute()
+            poll = await self.get_cached_poll(poll_id)
             
-            if not poll_result.data:
+            if not poll:
                 await interaction.response.send_message("❌ Poll not found.", ephemeral=True)
                 return
             
-            current_status = poll_result.data[0]['is_locked']
+            current_status = poll['is_locked']
             new_status = not current_status
             
             # Update lock status
-            await self.supabase.table('gotw_polls').update({
-                'is_locked': new_status
-            }).eq('id', poll_id).execute()
+            await self.update_poll(poll_id, {'is_locked': new_status})
             
             status_text = "locked" if new_status else "unlocked"
             await interaction.response.send_message(f"✅ Poll has been {status_text}.", ephemeral=True)
             
             # Update the message
-            await self.update_vote_message(interaction.message, poll_id)
+            self.schedule_vote_message_update(interaction.message, poll_id)
             
         except Exception as e:
             logger.error(f"Error locking poll: {e}")
@@ -380,26 +474,25 @@ class GOTWSystem(commands.Cog):
             await interaction.response.send_message("❌ You don't have permission to declare winners.", ephemeral=True)
             return
         
-        if not self.supabase:
+        if not self.db:
             await interaction.response.send_message("❌ Database connection not available.", ephemeral=True)
             return
         
         try:
             # Update poll with winner
-            await self.supabase.table('gotw_polls').update({
+            await self.update_poll(poll_id, {
                 'winner_declared': True,
                 'winner_team': winning_team,
                 'winner_declared_by': interaction.user.id,
                 'winner_declared_at': datetime.now().isoformat()
-            }).eq('id', poll_id).execute()
+            })
             
             # Award points to voters and team claimers
             await self.award_points_for_winner(poll_id, winning_team)
             
             # Get team name for confirmation
-            poll_result = await self.supabase.table('gotw_polls').select('team1_name', 'team2_name', 'team1_abbr', 'team2_abbr').eq('id', poll_id).execute()
-            if poll_result.data:
-                poll_data = poll_result.data[0]
+            poll_data = await self.get_cached_poll(poll_id)
+            if poll_data:
                 winner_name = poll_data['team1_name'] if winning_team == poll_data['team1_abbr'] else poll_data['team2_name']
                 await interaction.response.send_message(f"🏆 {winner_name} has been declared the winner!", ephemeral=True)
             
@@ -416,72 +509,95 @@ class GOTWSystem(commands.Cog):
                 return
             
             # Get winning voters
-            votes_result = await self.supabase.table('gotw_votes').select('user_id').eq('poll_id', poll_id).eq('team_abbr', winning_team).execute()
+            winning_votes = await self.db.get_votes(poll_id, winning_team, 'user_id')
             
             # Award points to voters
-            for vote in votes_result.data:
+            for vote in winning_votes:
                 try:
-                    await points_cog.add_user_points(vote['user_id'], 1, "GOTW vote")
+                    await points_cog.add_user_points(vote['user_id'], 1)
                 except Exception as e:
                     logger.error(f"Error awarding points to user {vote['user_id']}: {e}")
             
             # Award points to team claimers
             team_claim_cog = self.bot.get_cog('TeamClaimSystem')
             if team_claim_cog:
-                winning_team_claimer = team_claim_cog.get_team_claim(winning_team)
+                winning_team_claimer = await team_claim_cog.get_team_claim(winning_team)
                 if winning_team_claimer:
                     try:
-                        await points_cog.add_user_points(int(winning_team_claimer['user_id']), 2, "GOTW team claim")
+                        await points_cog.add_user_points(int(winning_team_claimer), 2)
                     except Exception as e:
                         logger.error(f"Error awarding team claim points: {e}")
                         
         except Exception as e:
             logger.error(f"Error awarding points for winner: {e}")
 
-    async def update_vote_message(self, message: discord.Message, poll_id: str):
-        """Update the vote message with current counts and lock status"""
-        try:
-            if not self.supabase:
-                return
-            
-            # Try to get poll data with vote counts using the function
+    async def get_poll_results(self, poll_id: str):
+        """Return the poll row with vote counts, from the in-memory tallies when the poll is open"""
+        if poll_id in self.poll_tallies:
+            poll = await self.get_cached_poll(poll_id)
+            if poll:
+                team1_votes, team2_votes, total_votes = self.poll_tallies.counts(
+                    poll_id, poll['team1_abbr'], poll['team2_abbr']
+                )
+                return dict(poll, team1_votes=team1_votes, team2_votes=team2_votes, total_votes=total_votes)
+        
+        # Try to get poll data with vote counts using the function, unless it is known to be missing
+        if self.db.rpc_available.get("get_poll_with_votes") is not False:
             try:
-                result = await self.supabase.rpc('get_poll_with_votes', {'poll_id_param': poll_id}).execute()
-                if result.data:
-                    poll_data = result.data[0]
-                else:
+                poll_data = await self.db.get_poll_with_votes(poll_id)
+                if not poll_data:
                     raise Exception("No data returned from function")
+                return poll_data
             except Exception as e:
+                if is_missing_function(e):
+                    self.db.rpc_available["get_poll_with_votes"] = False
                 # Fallback to manual query if function doesn't exist
-                logger.warning(f"get_poll_with_votes function failed in update_vote_message, using fallback: {e}")
-                
-                # Get poll data
-                poll_result = await self.supabase.table('gotw_polls').select('*').eq('id', poll_id).execute()
-                if not poll_result.data:
-                    return
-                
-                poll_info = poll_result.data[0]
-                
-                # Get vote counts manually
-                votes_result = await self.supabase.table('gotw_votes').select('team_abbr').eq('poll_id', poll_id).execute()
-                
-                team1_votes = len([v for v in votes_result.data if v['team_abbr'] == poll_info['team1_abbr']])
-                team2_votes = len([v for v in votes_result.data if v['team_abbr'] == poll_info['team2_abbr']])
-                total_votes = len(votes_result.data)
+                logger.warning(f"get_poll_with_votes function failed, using fallback: {e}")
+        
+        # Get poll data
+        poll_info = await self.get_cached_poll(poll_id)
+        if not poll_info:
+            return None
+        
+        # Get vote counts manually
+        votes = await self.db.get_votes(poll_id)
+        
+        team1_votes = len([v for v in votes if v['team_abbr'] == poll_info['team1_abbr']])
+        team2_votes = len([v for v in votes if v['team_abbr'] == poll_info['team2_abbr']])
+        
+        return dict(poll_info, team1_votes=team1_votes, team2_votes=team2_votes, total_votes=len(votes))
+
+    def schedule_vote_message_update(self, message: discord.Message, poll_id: str):
+        """Mark a poll card as needing a refresh; refreshes are coalesced per poll"""
+        self.dirty_poll_messages[poll_id] = message
+        task = self.poll_message_tasks.get(poll_id)
+        if task is None or task.done():
+            self.poll_message_tasks[poll_id] = asyncio.create_task(self.flush_vote_message_updates(poll_id))
+    
+    async def flush_vote_message_updates(self, poll_id: str):
+        """Edit a poll card at most once per MESSAGE_EDIT_INTERVAL, always with the latest tallies"""
+        try:
+            while poll_id in self.dirty_poll_messages:
+                wait = self.last_poll_message_edit.get(poll_id, 0) + self.MESSAGE_EDIT_INTERVAL - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
                 
-                # Create poll_data structure
-                poll_data = {
-                    'team1_name': poll_info['team1_name'],
-                    'team1_abbr': poll_info['team1_abbr'],
-                    'team2_name': poll_info['team2_name'],
-                    'team2_abbr': poll_info['team2_abbr'],
-                    'is_locked': poll_info['is_locked'],
-                    'winner_declared': poll_info['winner_declared'],
-                    'winner_team': poll_info['winner_team'],
-                    'team1_votes': team1_votes,
-                    'team2_votes': team2_votes,
-                    'total_votes': total_votes
-                }
+                # Votes that arrive during the edit mark the poll dirty again for the next pass
+                message = self.dirty_poll_messages.pop(poll_id)
+                self.last_poll_message_edit[poll_id] = time.monotonic()
+                await self.update_vote_message(message, poll_id)
+        finally:
+            self.poll_message_tasks.pop(poll_id, None)
+    
+    async def update_vote_message(self, message: discord.Message, poll_id: str):
+        """Update the vote message with current counts and lock status"""
+        try:
+            if not self.db:
+                return
+            
+            poll_data = await self.get_poll_results(poll_id)
+            if not poll_data:
+                return
             
             # Get current embed
             if message.embeds:
@@ -1,40 +1,108 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import logging
-from supabase import create_client, Client
-import os
-from dotenv import load_dotenv
+import time
+from utils.cache import TTLCache
+from utils.guild_settings import COMMISH_ROLE
+from utils.leaderboard import Leaderboard
+from utils.member_resolver import MemberResolver
 
-load_dotenv()
 logger = logging.getLogger(__name__)
 
 class PointsSystemSupabase(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         
-        # Initialize Supabase client
-        self.supabase_url = os.getenv('SUPABASE_URL')
-        self.supabase_key = os.getenv('SUPABASE_ANON_KEY')
+        # Shared Supabase repository (created once by the bot)
+        self.db = bot.db
         
-        if not self.supabase_url or not self.supabase_key:
+        if not self.db:
             logger.error("SUPABASE_URL and SUPABASE_ANON_KEY must be set in environment variables")
             raise ValueError("Supabase credentials not found")
         
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
+        # Write-through cache of total_points keyed by user ID
+        self.BALANCE_CACHE_SIZE = 2048
+        self.BALANCE_CACHE_TTL = 600  # 10 minutes in seconds
+        self.balance_cache = TTLCache(maxsize=self.BALANCE_CACHE_SIZE, ttl=self.BALANCE_CACHE_TTL)
+        
+        # Ranked leaderboard kept in memory and reconciled against the database
+        self.leaderboard_snapshot = Leaderboard()
+        
+        # Batched, cached display-name lookups for leaderboard rows
+        self.member_resolver = MemberResolver(bot, self.db)
+        
         logger.info("✅ PointsSystemSupabase cog initialized")
     
+    async def cog_load(self):
+        """Load the leaderboard snapshot and start periodic reconciliation"""
+        self.reconcile_leaderboard.start()
+    
+    async def cog_unload(self):
+        """Stop background tasks when the cog is unloaded"""
+        self.reconcile_leaderboard.cancel()
+    
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Drop a cached display name when a member's nickname changes"""
+        if before.display_name != after.display_name:
+            self.member_resolver.invalidate(after.guild.id, after.id)
+    
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        """Drop cached lookups for a member who left"""
+        self.member_resolver.invalidate(member.guild.id, member.id)
+    
+    @commands.Cog.listener()
+    async def on_user_update(self, before, after):
+        """Drop cached display names when a user's name changes"""
+        if before.display_name != after.display_name or before.name != after.name:
+            self.member_resolver.invalidate_user(after.id)
+    
+    @tasks.loop(minutes=15)
+    async def reconcile_leaderboard(self):
+        """Rebuild the leaderboard snapshot from the database to catch out-of-band edits"""
+        try:
+            started_at = time.monotonic()
+            rows = await self.db.get_all_user_points()
+            self.leaderboard_snapshot.load(
+                [(row["id"], row["total_points"]) for row in rows],
+                started_at=started_at
+            )
+            logger.info(f"Leaderboard snapshot reconciled: {len(self.leaderboard_snapshot)} users with points")
+        except Exception as e:
+            logger.error(f"Error reconciling leaderboard snapshot: {e}")
+    
+    def cache_user_points(self, user_id, points):
+        """Record a user's known total so the next read is served from memory"""
+        self.balance_cache.set(str(user_id), points)
+        self.leaderboard_snapshot.update(user_id, points)
+    
+    def invalidate_user_points(self, user_id=None):
+        """Forget a user's cached total (or every cached total if no user is given)"""
+        if user_id is None:
+            self.balance_cache.clear()
+        else:
+            self.balance_cache.invalidate(str(user_id))
+    
     async def get_user_points(self, user_id):
         """Get points for a specific user"""
+        cached_points = self.balance_cache.get(str(user_id))
+        if cached_points is not None:
+            return cached_points
+        
         try:
-            result = self.supabase.table("users").select("total_points").eq("id", str(user_id)).execute()
+            user = await self.db.get_user(user_id, "total_points")
             
-            if result.data and len(result.data) > 0:
-                return result.data[0]["total_points"]
+            if user:
+                points = user["total_points"]
             else:
                 # User doesn't exist, create them with 0 points
                 await self.create_user(user_id)
-                return 0
+                points = 0
+            
+            self.cache_user_points(user_id, points)
+            return points
         except Exception as e:
             logger.error(f"Error getting user points for {user_id}: {e}")
             return 0
@@ -54,9 +122,9 @@ class PointsSystemSupabase(commands.Cog):
             if username:
                 user_data["username"] = username
             
-            result = self.supabase.table("users").insert(user_data).execute()
+            user = await self.db.create_user(user_data)
             logger.info(f"Created new user {user_id} in database")
-            return result.data[0] if result.data else None
+            return user
         except Exception as e:
             logger.error(f"Error creating user {user_id}: {e}")
             return None
@@ -74,65 +142,130 @@ class PointsSystemSupabase(commands.Cog):
             if username:
                 user_data["username"] = username
             
-            result = self.supabase.table("users").upsert(user_data).execute()
-            return result.data[0] if result.data else None
+            result = await self.db.upsert_user(user_data)
+            self.cache_user_points(user_id, points)
+            return result
         except Exception as e:
             logger.error(f"Error setting user points for {user_id}: {e}")
+            # The write may or may not have landed, so re-read next time
+            self.invalidate_user_points(user_id)
             return None
     
-    async def add_user_points(self, user_id, points_to_add, display_name=None, username=None):
-        """Add points to a specific user"""
+    async def change_user_points(self, user_id, delta, display_name=None, username=None):
+        """Atomically apply a point change (floored at zero) and return (old, new)"""
         try:
-            current_points = await self.get_user_points(user_id)
-            new_points = current_points + points_to_add
-            
-            await self.set_user_points(user_id, new_points, display_name, username)
-            return current_points, new_points
+            old_points, new_points = await self.db.increment_user_points(user_id, delta, display_name, username)
+            self.cache_user_points(user_id, new_points)
+            return old_points, new_points
         except Exception as e:
-            logger.error(f"Error adding points to user {user_id}: {e}")
+            logger.error(f"Error changing points for user {user_id} by {delta}: {e}")
+            self.invalidate_user_points(user_id)
             return 0, 0
     
+    async def add_user_points(self, user_id, points_to_add, display_name=None, username=None):
+        """Add points to a specific user"""
+        return await self.change_user_points(user_id, points_to_add, display_name, username)
+    
     async def remove_user_points(self, user_id, points_to_remove, display_name=None, username=None):
         """Remove points from a specific user"""
-        try:
-            current_points = await self.get_user_points(user_id)
-            new_points = max(0, current_points - points_to_remove)
-            
-            await self.set_user_points(user_id, new_points, display_name, username)
-            return current_points, new_points
-        except Exception as e:
-            logger.error(f"Error removing points from user {user_id}: {e}")
-            return 0, 0
+        return await self.change_user_points(user_id, -points_to_remove, display_name, username)
     
     async def clear_user_points(self, user_id, display_name=None, username=None):
         """Clear points for a specific user"""
         try:
-            current_points = await self.get_user_points(user_id)
-            await self.set_user_points(user_id, 0, display_name, username)
-            return current_points
+            changes = await self.db.clear_users_points([(user_id, display_name, username)])
+            self.cache_user_points(user_id, 0)
+            old_points, _ = changes.get(int(user_id), (0, 0))
+            return old_points
         except Exception as e:
             logger.error(f"Error clearing points for user {user_id}: {e}")
+            self.invalidate_user_points(user_id)
             return 0
     
-    async def get_leaderboard(self, limit=None):
-        """Get all users with points, sorted by points (descending)"""
+    async def change_users_points(self, users, delta):
+        """Apply one point change to several members, returning {user_id: (old, new)} or {} on failure"""
+        return await self._apply_bulk_change(users, lambda targets: self.db.increment_users_points(targets, delta))
+    
+    async def clear_users_points(self, users):
+        """Reset several members' points to zero, returning {user_id: (old, new)} or {} on failure"""
+        return await self._apply_bulk_change(users, self.db.clear_users_points)
+    
+    async def _apply_bulk_change(self, users, operation):
+        """Run a bulk point operation for members and keep the balance cache in step"""
+        targets = [(user.id, user.display_name, user.name) for user in users]
         try:
-            query = self.supabase.table("users").select("id, total_points, display_name, username").gt("total_points", 0).order("total_points", desc=True)
-            
-            if limit:
-                query = query.limit(limit)
-            
-            result = query.execute()
-            
-            if result.data:
-                return [(str(user["id"]), user["total_points"]) for user in result.data]
-            else:
-                return []
+            changes = await operation(targets)
         except Exception as e:
-            logger.error(f"Error getting leaderboard: {e}")
+            logger.error(f"Error applying bulk point change to {len(targets)} user(s): {e}")
+            for user in users:
+                self.invalidate_user_points(user.id)
+            return {}
+        
+        for user_id, (_, new_points) in changes.items():
+            self.cache_user_points(user_id, new_points)
+        return changes
+    
+    async def get_leaderboard_page(self, page_size, after=None, before=None):
+        """Get one leaderboard page of (user_id, points) next to a (points, user_id) cursor"""
+        if self.leaderboard_snapshot.loaded:
+            return self.leaderboard_snapshot.page(page_size, after=after, before=before)
+        
+        try:
+            rows = await self.db.get_leaderboard_page(page_size, after=after, before=before)
+            return [(str(user["id"]), user["total_points"]) for user in rows]
+        except Exception as e:
+            logger.error(f"Error getting leaderboard page: {e}")
             return []
     
-    def has_admin_permission(self, interaction):
+    async def count_users_with_points(self):
+        """Count users with more than zero points"""
+        if self.leaderboard_snapshot.loaded:
+            return len(self.leaderboard_snapshot)
+        
+        try:
+            return await self.db.count_users_with_points()
+        except Exception as e:
+            logger.error(f"Error counting users with points: {e}")
+            return 0
+    
+    async def build_leaderboard_embed(self, guild, rows, page_index, page_size, total_count):
+        """Build the leaderboard embed for one page of rows"""
+        embed = discord.Embed(
+            title="📊 Points Leaderboard",
+            description=f"All users with points ({total_count} total):",
+            color=0x0099ff
+        )
+        
+        # Resolve every name on the page in one batch (server nickname where possible)
+        display_names = await self.member_resolver.get_display_names(
+            guild,
+            [user_id for user_id, _ in rows]
+        )
+        
+        for i, (user_id, points) in enumerate(rows, page_index * page_size + 1):
+            display_name = display_names.get(int(user_id), f"User {user_id}")
+            
+            # Add medal emojis for top 3
+            if i == 1:
+                prefix = "🥇"
+            elif i == 2:
+                prefix = "🥈"
+            elif i == 3:
+                prefix = "🥉"
+            else:
+                prefix = f"**{i}.**"
+            
+            embed.add_field(
+                name=f"{prefix} {display_name}",
+                value=f"**{points:,}** points",
+                inline=False
+            )
+        
+        total_pages = max(1, -(-total_count // page_size))
+        embed.set_footer(text=f"Page {page_index + 1}/{total_pages} • Total users with points: {total_count}")
+        return embed
+    
+    async def has_admin_permission(self, interaction):
         """Check if user has commish role or administrator permissions"""
         # Check if user has administrator permission
         if interaction.user.guild_permissions.administrator:
@@ -140,7 +273,8 @@ class PointsSystemSupabase(commands.Cog):
             return True
         
         # Check if user has commish role
-        commish_role = discord.utils.get(interaction.guild.roles, name="commish")
+        await self.bot.settings.ensure_loaded(interaction.guild.id)
+        commish_role = self.bot.settings.get_role(interaction.guild, COMMISH_ROLE, "commish")
         if commish_role and commish_role in interaction.user.roles:
             logger.info(f"Allowing {interaction.user.display_name} to use admin commands (@commish role)")
             return True
@@ -150,77 +284,23 @@ class PointsSystemSupabase(commands.Cog):
     
     async def parse_user_mentions(self, interaction, users_string):
         """Parse user mentions from string and return list of member objects"""
-        mentioned_users = []
-        
-        # Debug logging
-        logger.info(f"Raw users input: '{users_string}'")
-        logger.info(f"Guild: {interaction.guild.name} (ID: {interaction.guild.id})")
-        logger.info(f"Guild member count: {interaction.guild.member_count}")
-        logger.info(f"Guild members loaded: {len(interaction.guild.members)}")
+        logger.debug(f"Raw users input: '{users_string}'")
         
-        # Split by spaces and process each mention
-        user_mentions = users_string.split()
-        logger.info(f"Split mentions: {user_mentions}")
-        
-        for user_mention in user_mentions:
-            logger.info(f"Processing mention: '{user_mention}'")
-            
+        # Collect every ID first so they can be resolved in one pass
+        user_ids = []
+        for user_mention in users_string.split():
             # Remove < > @ ! characters and get user ID
             clean_id = user_mention.strip('<>@!')
-            logger.info(f"Cleaned ID: '{clean_id}'")
-            
             if clean_id.isdigit():
-                user_id = int(clean_id)
-                
-                # Try multiple methods to find the user
-                # Method 1: Direct guild member lookup
-                member = interaction.guild.get_member(user_id)
-                if member:
-                    mentioned_users.append(member)
-                    logger.info(f"✅ Found user via guild.get_member: {member.display_name}")
-                    continue
-                
-                # Method 2: Search through guild members
-                for guild_member in interaction.guild.members:
-                    if guild_member.id == user_id:
-                        mentioned_users.append(guild_member)
-                        logger.info(f"✅ Found user via guild members list: {guild_member.display_name}")
-                        break
-                else:
-                    # Method 3: Try to fetch member directly
-                    try:
-                        member = await interaction.guild.fetch_member(user_id)
-                        if member:
-                            mentioned_users.append(member)
-                            logger.info(f"✅ Found user via guild.fetch_member: {member.display_name}")
-                            continue
-                    except discord.NotFound:
-                        logger.warning(f"User {user_id} is not a member of this guild")
-                    except Exception as e:
-                        logger.error(f"Error fetching member {user_id}: {e}")
-                    
-                    # Method 4: Fallback - fetch user and create a mock member for points system
-                    try:
-                        user = await interaction.client.fetch_user(user_id)
-                        if user:
-                            logger.info(f"⚠️ Found user via API but not in guild: {user.display_name}")
-                            # For the points system, we'll still add them even if not in guild
-                            # Create a simple mock member object
-                            class MockMember:
-                                def __init__(self, user):
-                                    self.id = user.id
-                                    self.display_name = user.display_name
-                                    self.name = user.name
-                            
-                            mock_member = MockMember(user)
-                            mentioned_users.append(mock_member)
-                            logger.info(f"✅ Using mock member for points: {mock_member.display_name}")
-                    except Exception as e:
-                        logger.error(f"Error fetching user {clean_id}: {e}")
+                user_ids.append(int(clean_id))
             else:
-                logger.warning(f"Invalid user ID format: {clean_id}")
+                logger.debug(f"Invalid user ID format: {clean_id}")
+        
+        members = await self.member_resolver.get_members(interaction.guild, user_ids)
         
-        logger.info(f"Total users found: {len(mentioned_users)}")
+        # Keep mention order and drop duplicates
+        mentioned_users = [members[user_id] for user_id in dict.fromkeys(user_ids) if user_id in members]
+        logger.debug(f"Total users found: {len(mentioned_users)}")
         return mentioned_users
     
     @app_commands.command(name="checkstats", description="Get points of yourself or mentioned user")
@@ -274,7 +354,7 @@ class PointsSystemSupabase(commands.Cog):
     )
     async def add_points(self, interaction: discord.Interaction, users: str, points: int):
         """Add points to mentioned users (Admin/Commish only)"""
-        if not self.has_admin_permission(interaction):
+        if not await self.has_admin_permission(interaction):
             await interaction.response.send_message(
                 "❌ You need administrator permissions or the 'commish' role to use this command.", 
                 ephemeral=True
@@ -302,19 +382,22 @@ class PointsSystemSupabase(commands.Cog):
                 )
                 return
             
-            # Add points to each user
+            # Add points to every user in one round trip
+            changes = await self.change_users_points(mentioned_users, points)
+            
+            if not changes:
+                await interaction.followup.send(
+                    "❌ An error occurred while adding points.", 
+                    ephemeral=True
+                )
+                return
+            
             results = []
             for user in mentioned_users:
-                old_points, new_points = await self.add_user_points(
-                    user.id, 
-                    points, 
-                    user.display_name, 
-                    user.name
-                )
+                old_points, new_points = changes.get(user.id, (0, 0))
                 results.append(f"• **{user.display_name}**: {old_points:,} → **{new_points:,}** (+{points:,})")
-                
-                # Debug logging
-                logger.info(f"Added {points} points to user {user.id} ({user.display_name}): {old_points} → {new_points}")
+            
+            logger.info(f"Added {points} points to {len(changes)} user(s)")
             
             embed = discord.Embed(
                 title="✅ Points Added Successfully",
@@ -341,7 +424,7 @@ class PointsSystemSupabase(commands.Cog):
     )
     async def remove_points(self, interaction: discord.Interaction, users: str, points: int):
         """Remove points from mentioned users (Admin/Commish only)"""
-        if not self.has_admin_permission(interaction):
+        if not await self.has_admin_permission(interaction):
             await interaction.response.send_message(
                 "❌ You need administrator permissions or the 'commish' role to use this command.", 
                 ephemeral=True
@@ -369,15 +452,19 @@ class PointsSystemSupabase(commands.Cog):
                 )
                 return
             
-            # Remove points from each user
+            # Remove points from every user in one round trip
+            changes = await self.change_users_points(mentioned_users, -points)
+            
+            if not changes:
+                await interaction.followup.send(
+                    "❌ An error occurred while removing points.", 
+                    ephemeral=True
+                )
+                return
+            
             results = []
             for user in mentioned_users:
-                old_points, new_points = await self.remove_user_points(
-                    user.id, 
-                    points, 
-                    user.display_name, 
-                    user.name
-                )
+                old_points, new_points = changes.get(user.id, (0, 0))
                 results.append(f"• **{user.display_name}**: {old_points:,} → **{new_points:,}** (-{points:,})")
             
             embed = discord.Embed(
@@ -402,7 +489,7 @@ class PointsSystemSupabase(commands.Cog):
     @app_commands.describe(users="Users to clear points from (mention multiple users)")
     async def clear_points(self, interaction: discord.Interaction, users: str):
         """Clear points from mentioned users (Admin/Commish only)"""
-        if not self.has_admin_permission(interaction):
+        if not await self.has_admin_permission(interaction):
             await interaction.response.send_message(
                 "❌ You need administrator permissions or the 'commish' role to use this command.", 
                 ephemeral=True
@@ -423,14 +510,19 @@ class PointsSystemSupabase(commands.Cog):
                 )
                 return
             
-            # Clear points from each user
+            # Clear points from every user in one round trip
+            changes = await self.clear_users_points(mentioned_users)
+            
+            if not changes:
+                await interaction.followup.send(
+                    "❌ An error occurred while clearing points.", 
+                    ephemeral=True
+                )
+                return
+            
             results = []
             for user in mentioned_users:
-                old_points = await self.clear_user_points(
-                    user.id, 
-                    user.display_name, 
-                    user.name
-                )
+                old_points, _ = changes.get(user.id, (0, 0))
                 results.append(f"• **{user.display_name}**: {old_points:,} → **0** (cleared)")
             
             embed = discord.Embed(
@@ -452,20 +544,20 @@ class PointsSystemSupabase(commands.Cog):
             )
     
     @app_commands.command(name="leaderboard", description="Get server's points leaderboard")
-    @app_commands.describe(limit="Number of users to show (optional, max 50)")
+    @app_commands.describe(limit="Number of users per page (optional, max 20)")
     async def leaderboard(self, interaction: discord.Interaction, limit: int = None):
         """Show the server's points leaderboard"""
         # Defer the response to prevent timeouts
         await interaction.response.defer()
         
         try:
-            # If limit is specified, validate it
-            if limit is not None:
-                limit = min(max(1, limit), 50)
+            # Limit to 20 fields per page (Discord limit)
+            page_size = min(max(1, limit), 20) if limit is not None else 20
             
-            leaderboard_data = await self.get_leaderboard(limit)
+            # Fetch one extra row to know whether there is a next page
+            rows = await self.get_leaderboard_page(page_size + 1)
             
-            if not leaderboard_data:
+            if not rows:
                 embed = discord.Embed(
                     title="📊 Points Leaderboard",
                     description="No users have points yet!",
@@ -474,73 +566,18 @@ class PointsSystemSupabase(commands.Cog):
                 await interaction.followup.send(embed=embed)
                 return
             
-            embed = discord.Embed(
-                title="📊 Points Leaderboard",
-                description=f"All users with points ({len(leaderboard_data)} total):",
-                color=0x0099ff
-            )
+            total_count = await self.count_users_with_points() or len(rows)
+            has_next = len(rows) > page_size
+            rows = rows[:page_size]
             
-            # Limit to 20 fields (Discord limit)
-            max_fields = min(len(leaderboard_data), 20)
-            
-            for i, (user_id, points) in enumerate(leaderboard_data[:max_fields], 1):
-                # Try to get user from guild cache first (this gives server nickname)
-                user = interaction.guild.get_member(int(user_id))
-                display_name = None
-                
-                if user:
-                    # Use server nickname (display_name) if available, otherwise use global name
-                    display_name = user.display_name
-                else:
-                    # Try to fetch user from guild (this gives server nickname)
-                    try:
-                        user = await interaction.guild.fetch_member(int(user_id))
-                        if user:
-                            display_name = user.display_name
-                    except:
-                        # Fallback to global name if not in server
-                        try:
-                            user_obj = await interaction.client.fetch_user(int(user_id))
-                            if user_obj:
-                                display_name = user_obj.display_name
-                        except:
-                            display_name = f"User {user_id}"
-                
-                if display_name:
-                    # Add medal emojis for top 3
-                    if i == 1:
-                        prefix = "🥇"
-                    elif i == 2:
-                        prefix = "🥈"
-                    elif i == 3:
-                        prefix = "🥉"
-                    else:
-                        prefix = f"**{i}.**"
-                    
-                    embed.add_field(
-                        name=f"{prefix} {display_name}",
-                        value=f"**{points:,}** points",
-                        inline=False
-                    )
-            
-            # Add note if we truncated the list
-            if len(leaderboard_data) > 20:
-                embed.add_field(
-                    name="",
-                    value=f"... and {len(leaderboard_data) - 20} more users",
-                    inline=False
-                )
+            embed = await self.build_leaderboard_embed(interaction.guild, rows, 0, page_size, total_count)
             
-            # Count users with points > 0 for accurate footer
-            try:
-                count_result = self.supabase.table("users").select("id", count="exact").gt("total_points", 0).execute()
-                users_with_points_count = count_result.count if count_result.count else len(leaderboard_data)
-            except:
-                users_with_points_count = len(leaderboard_data)
-            
-            embed.set_footer(text=f"Total users with points: {users_with_points_count}")
+            if not has_next:
+                await interaction.followup.send(embed=embed)
+                return
             
-            await interaction.followup.send(embed=embed)
+            view = LeaderboardView(self, interaction.user.id, page_size, total_count, rows, has_next)
+            view.message = await interaction.followup.send(embed=embed, view=view, wait=True)
             
         except Exception as e:
             logger.error(f"Error in leaderboard: {e}")
@@ -549,11 +586,64 @@ class PointsSystemSupabase(commands.Cog):
                 ephemeral=True
             )
     
+    @app_commands.command(name="setcommishrole", description="Set the role allowed to use commish commands (Admin only)")
+    @app_commands.describe(role="Role that can manage points and other commish commands")
+    async def set_commish_role(self, interaction: discord.Interaction, role: discord.Role):
+        """Set the commish role used by admin permission checks (Admin only)"""
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message(
+                "❌ You need administrator permissions to set the commish role.",
+                ephemeral=True
+            )
+            return
+        
+        try:
+            await self.bot.settings.set(interaction.guild.id, COMMISH_ROLE, role.id)
+            logger.info(f"Setting commish role: {role.name} (ID: {role.id}) in guild {interaction.guild.name}")
+            await interaction.response.send_message(
+                f"✅ Members with {role.mention} can now use commish commands.",
+                ephemeral=True
+            )
+        except Exception as e:
+            logger.error(f"Error in set_commish_role: {e}")
+            await interaction.response.send_message("❌ An error occurred while setting the commish role.", ephemeral=True)
+    
+    @app_commands.command(name="pointscache", description="Show points cache statistics (Commish only)")
+    async def points_cache_stats(self, interaction: discord.Interaction):
+        """Show hit/miss counters for the balance cache (Commish only)"""
+        if not await self.has_admin_permission(interaction):
+            await interaction.response.send_message(
+                "❌ You need administrator permissions or the 'commish' role to use this command.", 
+                ephemeral=True
+            )
+            return
+        
+        stats = self.balance_cache.stats()
+        
+        embed = discord.Embed(
+            title="🗄️ Points Cache",
+            color=0x0099ff
+        )
+        embed.add_field(name="Cached Users", value=f"{stats['size']:,}/{stats['maxsize']:,}", inline=True)
+        embed.add_field(name="Hits", value=f"{stats['hits']:,}", inline=True)
+        embed.add_field(name="Misses", value=f"{stats['misses']:,}", inline=True)
+        embed.add_field(name="Hit Rate", value=f"{stats['hit_rate']:.1%}", inline=True)
+        
+        name_stats = self.member_resolver.name_cache.stats()
+        embed.add_field(
+            name="Name Cache",
+            value=f"{name_stats['size']:,} names, {name_stats['hits']:,} hits / {name_stats['misses']:,} misses",
+            inline=False
+        )
+        embed.set_footer(text=f"Entries expire after {self.BALANCE_CACHE_TTL // 60} minutes")
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
     @app_commands.command(name="clearstreampoints", description="Clear stream points from a user (Commish only)")
     @app_commands.describe(user="User to clear stream points from")
     async def clear_stream_points(self, interaction: discord.Interaction, user: discord.Member):
         """Clear stream points from a specific user (Commish only)"""
-        if not self.has_admin_permission(interaction):
+        if not await self.has_admin_permission(interaction):
             await interaction.response.send_message(
                 "❌ You need administrator permissions or the 'commish' role to use this command.", 
                 ephemeral=True
@@ -562,18 +652,17 @@ class PointsSystemSupabase(commands.Cog):
         
         try:
             # Get current stream points and total points
-            from config.supabase_config import supabase
-            result = supabase.table("users").select("stream_points, total_points").eq("id", str(user.id)).execute()
+            user_row = await self.db.get_user(user.id, "stream_points, total_points")
             
-            if not result.data:
+            if not user_row:
                 await interaction.response.send_message(
                     f"ℹ️ {user.display_name} doesn't have any points to clear.", 
                     ephemeral=True
                 )
                 return
             
-            current_stream_points = result.data[0].get("stream_points", 0)
-            current_total_points = result.data[0].get("total_points", 0)
+            current_stream_points = user_row.get("stream_points", 0)
+            current_total_points = user_row.get("total_points", 0)
             
             if current_stream_points == 0:
                 await interaction.response.send_message(
@@ -586,14 +675,12 @@ class PointsSystemSupabase(commands.Cog):
             new_total_points = current_total_points - current_stream_points
             
             # Update user to have 0 stream points and reduced total points
-            supabase.table("users").upsert(
-                {
-                    "id": str(user.id),
-                    "stream_points": 0,
-                    "total_points": new_total_points
-                },
-                on_conflict="id"
-            ).execute()
+            await self.db.upsert_user({
+                "id": str(user.id),
+                "stream_points": 0,
+                "total_points": new_total_points
+            })
+            self.cache_user_points(user.id, new_total_points)
             
             embed = discord.Embed(
                 title="🎯 Stream Points Cleared",
@@ -622,6 +709,89 @@ class PointsSystemSupabase(commands.Cog):
                 ephemeral=True
             )
 
+class LeaderboardView(discord.ui.View):
+    """Prev/Next buttons that page through the leaderboard one keyset page at a time"""
+    
+    def __init__(self, cog, owner_id, page_size, total_count, rows, has_next):
+        super().__init__(timeout=300)  # 5 minute timeout
+        self.cog = cog
+        self.owner_id = owner_id
+        self.page_size = page_size
+        self.total_count = total_count
+        self.rows = rows
+        self.page_index = 0
+        self.has_next = has_next
+        self.message = None
+        self.update_buttons()
+    
+    def update_buttons(self):
+        """Enable only the directions that have more rows"""
+        self.previous_page.disabled = self.page_index == 0
+        self.next_page.disabled = not self.has_next
+    
+    @staticmethod
+    def cursor(row):
+        """Keyset cursor (points, user_id) for a leaderboard row"""
+        user_id, points = row
+        return points, int(user_id)
+    
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message(
+                "❌ Only the person who ran `/leaderboard` can change pages. Run it yourself to browse!",
+                ephemeral=True
+            )
+            return False
+        return True
+    
+    async def show_page(self, interaction: discord.Interaction, rows, page_index, has_next):
+        """Swap in a new page of rows and redraw the message"""
+        self.rows = rows
+        self.page_index = page_index
+        self.has_next = has_next
+        self.update_buttons()
+        
+        embed = await self.cog.build_leaderboard_embed(
+            interaction.guild, self.rows, self.page_index, self.page_size, self.total_count
+        )
+        await interaction.edit_original_response(embed=embed, view=self)
+    
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.defer()
+        rows = await self.cog.get_leaderboard_page(self.page_size, before=self.cursor(self.rows[0]))
+        
+        if not rows or self.page_index <= 1:
+            # Back at (or past) the top; reload the first page so ranks line up
+            rows = await self.cog.get_leaderboard_page(self.page_size + 1)
+            await self.show_page(interaction, rows[:self.page_size], 0, len(rows) > self.page_size)
+            return
+        
+        await self.show_page(interaction, rows, self.page_index - 1, True)
+    
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.defer()
+        rows = await self.cog.get_leaderboard_page(self.page_size + 1, after=self.cursor(self.rows[-1]))
+        
+        if not rows:
+            # Everyone past this page dropped off since it was shown
+            self.has_next = False
+            self.update_buttons()
+            await interaction.edit_original_response(view=self)
+            return
+        
+        await self.show_page(interaction, rows[:self.page_size], self.page_index + 1, len(rows) > self.page_size)
+    
+    async def on_timeout(self):
+        """Disable the buttons once the view expires"""
+        for item in self.children:
+            item.disabled = True
+        try:
+            await self.message.edit(view=self)
+        except:
+            pass  # Ignore if message is already deleted
+
 async def setup(bot):
     await bot.add_cog(PointsSystemSupabase(bot))
     logger.info("✅ PointsSystemSupabase cog added to bot")
@@ -2,27 +2,21 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import logging
-import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
+from utils.guild_settings import COMMISH_ROLE
 
-load_dotenv()
 logger = logging.getLogger(__name__)
 
 class SpendingSystemSupabase(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         
-        # Initialize Supabase client
-        self.supabase_url = os.getenv('SUPABASE_URL')
-        self.supabase_key = os.getenv('SUPABASE_ANON_KEY')
+        # Shared Supabase repository (created once by the bot)
+        self.db = bot.db
         
-        if not self.supabase_url or not self.supabase_key:
+        if not self.db:
             logger.error("SUPABASE_URL and SUPABASE_ANON_KEY must be set in environment variables")
             raise ValueError("Supabase credentials not found")
         
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
-        
         # Position and attribute definitions
         # Expanded positions for dropdown selection
         self.POSITIONS = [
@@ -163,11 +157,16 @@ class SpendingSystemSupabase(commands.Cog):
     
     async def get_user_points(self, user_id):
         """Get user's current points from the points system"""
+        # Prefer the points system so reads share its balance cache
+        points_cog = self.bot.get_cog('PointsSystemSupabase')
+        if points_cog:
+            return await points_cog.get_user_points(user_id)
+        
         try:
-            result = self.supabase.table("users").select("total_points").eq("id", user_id).execute()
+            user = await self.db.get_user(user_id, "total_points")
             
-            if result.data and len(result.data) > 0:
-                return result.data[0]["total_points"]
+            if user:
+                return user["total_points"]
             else:
                 # User doesn't exist, create them with 0 points
                 await self.create_user(user_id)
@@ -191,30 +190,22 @@ class SpendingSystemSupabase(commands.Cog):
             if username:
                 user_data["username"] = username
             
-            result = self.supabase.table("users").insert(user_data).execute()
+            user = await self.db.create_user(user_data)
             logger.info(f"Created new user {user_id} in database")
-            return result.data[0] if result.data else None
+            return user
         except Exception as e:
             logger.error(f"Error creating user {user_id}: {e}")
             return None
     
     async def deduct_user_points(self, user_id, points_to_deduct, display_name=None, username=None):
         """Deduct points from user's account"""
+        points_cog = self.bot.get_cog('PointsSystemSupabase')
+        if points_cog:
+            _, new_points = await points_cog.remove_user_points(user_id, points_to_deduct, display_name, username)
+            return new_points
+        
         try:
-            current_points = await self.get_user_points(user_id)
-            new_points = max(0, current_points - points_to_deduct)
-            
-            user_data = {
-                "id": user_id,
-                "total_points": new_points
-            }
-            
-            if display_name:
-                user_data["display_name"] = display_name
-            if username:
-                user_data["username"] = username
-            
-            result = self.supabase.table("users").upsert(user_data).execute()
+            _, new_points = await self.db.increment_user_points(user_id, -points_to_deduct, display_name, username)
             return new_points
         except Exception as e:
             logger.error(f"Error deducting user points for {user_id}: {e}")
@@ -223,12 +214,12 @@ class SpendingSystemSupabase(commands.Cog):
     async def get_user_cards(self, user_id):
         """Get user's player cards from database"""
         try:
-            result = self.supabase.table("player_cards").select("*").eq("user_id", user_id).execute()
+            rows = await self.db.get_player_cards(user_id)
             
-            if result.data:
+            if rows:
                 # Convert database format to the expected format
                 cards = {}
-                for card in result.data:
+                for card in rows:
                     position = card["position"]
                     attributes = card["attributes"]
                     cards[position] = attributes
@@ -243,25 +234,22 @@ class SpendingSystemSupabase(commands.Cog):
         """Add or update a player upgrade"""
         try:
             # Get existing card or create new one
-            existing_result = self.supabase.table("player_cards").select("*").eq("user_id", user_id).eq("position", f"{position} {player_name}").execute()
+            card = await self.db.get_player_card(user_id, f"{position} {player_name}")
             
-            if existing_result.data and len(existing_result.data) > 0:
+            if card:
                 # Update existing card
-                card = existing_result.data[0]
                 attributes = card["attributes"]
                 attributes[attribute] = attributes.get(attribute, 0) + int(points_spent)
                 
-                result = self.supabase.table("player_cards").update({
-                    "attributes": attributes
-                }).eq("id", card["id"]).execute()
+                await self.db.update_player_card_attributes(card["id"], attributes)
             else:
                 # Create new card
                 attributes = {attribute: int(points_spent)}
-                result = self.supabase.table("player_cards").insert({
+                await self.db.insert_player_card({
                     "user_id": user_id,
                     "position": f"{position} {player_name}",
                     "attributes": attributes
-                }).execute()
+                })
             
             # Deduct points
             await self.deduct_user_points(user_id, points_spent, display_name, username)
@@ -271,7 +259,7 @@ class SpendingSystemSupabase(commands.Cog):
             logger.error(f"Error adding player upgrade for {user_id}: {e}")
             return False
     
-    def has_admin_permission(self, interaction):
+    async def has_admin_permission(self, interaction):
         """Check if user has commish role or administrator permissions"""
         # Check if user has administrator permission
         if interaction.user.guild_permissions.administrator:
@@ -279,7 +267,8 @@ class SpendingSystemSupabase(commands.Cog):
             return True
         
         # Check if user has commish role
-        commish_role = discord.utils.get(interaction.guild.roles, name="commish")
+        await self.bot.settings.ensure_loaded(interaction.guild.id)
+        commish_role = self.bot.settings.get_role(interaction.guild, COMMISH_ROLE, "commish")
         if commish_role and commish_role in interaction.user.roles:
             logger.info(f"Allowing {interaction.user.display_name} to use admin commands (@commish role)")
             return True
@@ -390,9 +379,9 @@ class SpendingSystemSupabase(commands.Cog):
                 return
             
             # Clear all cards for the user
-            result = self.supabase.table("player_cards").delete().eq("user_id", user.id).execute()
+            deleted_cards = await self.db.delete_player_cards(user.id)
             
-            if result.data:
+            if deleted_cards:
                 embed = discord.Embed(
                     title="🗑️ Cards Cleared",
                     description=f"Successfully cleared all player cards for **{user.display_name}**",
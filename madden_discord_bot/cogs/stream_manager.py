@@ -1,12 +1,23 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-import json
-import os
 import logging
 import re
+import asyncio
 import aiohttp
 import time
+import uuid
+from datetime import datetime, timezone
+from utils.announcement_queue import AnnouncementQueue
+from utils.cache import MISSING, TTLCache
+from utils.cooldowns import CooldownTracker
+from utils.guild_settings import COMMISH_ROLE, LEAGUE_ROLE, STREAM_CHANNEL
+from utils.member_resolver import MEMBER_QUERY_CHUNK, MemberResolver
+from config.settings import (
+    DEFAULT_STREAM_CHANNEL_ID, TWITCH_ACCESS_TOKEN, TWITCH_CLIENT_ID, TWITCH_POLL_ENABLED,
+    TWITCH_POLL_MAX_INTERVAL, TWITCH_POLL_MIN_INTERVAL, TWITCH_STREAMS_URL
+)
+from utils.json_store import JsonStore
 
 logger = logging.getLogger(__name__)
 
@@ -14,75 +25,228 @@ class StreamManager(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.streams_file = "data/stream_links.json"
-        self.streams_data = self.load_streams()
+        self.streams_store = JsonStore(self.streams_file, {"users": {}})
+        self.streams_data = self.streams_store.data
+        
+        # IDs with a registered stream link, so presence updates for everyone else return immediately
+        self.registered_streamers = {int(user_id) for user_id in self.streams_data.get("users", {})}
         
         # Stream cooldown settings (45 minutes = 2700 seconds)
         self.STREAM_COOLDOWN = 2700  # 45 minutes in seconds
+        self.stream_cooldowns_file = "data/stream_cooldowns.json"
+        self.stream_cooldowns_store = JsonStore(self.stream_cooldowns_file, {"cooldowns": {}})
+        self.stream_cooldowns = CooldownTracker(self.STREAM_COOLDOWN)
+        self.stream_cooldowns.load(self.stream_cooldowns_store.data.get("cooldowns", {}))
+        
+        # Most stream points a user can earn from streaming
+        self.STREAM_POINTS_CAP = 8
         
-        # Stream channel settings
+        # Stream channels set before guild settings existed; only read as a fallback
         self.stream_channel_file = "data/stream_channel.json"
-        self.stream_channel_data = self.load_stream_channel()
+        self.stream_channel_store = JsonStore(self.stream_channel_file, {"guilds": {}})
+        self.stream_channel_data = self.stream_channel_store.data
+        
+        # Track active streams, checkpointed to disk so a restart can pick them back up
+        self.active_streams_file = "data/active_streams.json"
+        self.active_streams_store = JsonStore(self.active_streams_file, {"streams": {}})
+        self.active_streams = {
+            int(user_id): stream_info
+            for user_id, stream_info in self.active_streams_store.data.get("streams", {}).items()
+        }  # {user_id: stream_info}
+        
+        # Checkpointed streams are reconciled once per process; stops that can't be confirmed
+        # from the member cache are re-checked after a delay with a presence query
+        self.active_streams_reconciled = False
+        self.STREAM_RECONCILE_DELAY = 300  # 5 minutes in seconds
+        self.reconcile_stops_task = None
+        
+        # A stream that stops and starts again within this window is treated as one stream
+        self.STREAM_FLAP_WINDOW = 120  # 2 minutes in seconds
+        self.recently_stopped = {}  # {user_id: (monotonic stop time, stream_info, ended_at)}
+        
+        # Stream starts already handled, keyed by (user_id, guild_id, time bucket)
+        self.STREAM_START_BUCKET = 300  # 5 minutes in seconds
+        self.handled_stream_starts = set()
+        
+        # Shared Supabase repository (created once by the bot)
+        self.db = bot.db
         
-        # Track active streams
-        self.active_streams = {}  # {user_id: stream_info}
+        # Twitch profile images keyed by username; misses are cached for less time
+        self.PROFILE_IMAGE_TTL = 21600  # 6 hours in seconds
+        self.PROFILE_IMAGE_MISS_TTL = 1800  # 30 minutes in seconds
+        self.PROFILE_IMAGE_TIMEOUT = 5  # seconds per probe
+        self.profile_image_cache = TTLCache(maxsize=1024, ttl=self.PROFILE_IMAGE_TTL)
+        self.http_session = None
+        
+        # Stream announcements are queued per channel so bursts go out as one message
+        self.ANNOUNCEMENT_COALESCE_WINDOW = 3  # seconds
+        self.announcements = AnnouncementQueue(coalesce_window=self.ANNOUNCEMENT_COALESCE_WINDOW)
+        
+        # Completed stream sessions are buffered and inserted in batches
+        self.SESSION_FLUSH_INTERVAL = 60  # seconds
+        self.SESSION_BATCH_SIZE = 50  # rows
+        self.SESSION_BUFFER_LIMIT = 5000  # rows kept while the database is unreachable
+        self.session_buffer = []
+        self.session_write_tasks = set()  # in-flight batch writes, kept so they aren't garbage-collected
+        
+        # Twitch live-status polling for streamers without a Discord Streaming presence
+        self.TWITCH_LOGINS_PER_REQUEST = 100  # Helix limit for user_login
+        self.twitch_poll_interval = TWITCH_POLL_MIN_INTERVAL
+        self.member_resolver = MemberResolver(bot, self.db)
         
         logger.info("✅ StreamManager cog initialized")
     
-    def load_streams(self):
-        """Load stream links data from JSON file"""
-        if os.path.exists(self.streams_file):
-            try:
-                with open(self.streams_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading stream links: {e}")
-                return {"users": {}}
-        else:
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(self.streams_file), exist_ok=True)
-            return {"users": {}}
+    def get_http_session(self):
+        """Return the HTTP session shared by Twitch lookups, opening it on first use"""
+        if self.http_session is None or self.http_session.closed:
+            self.http_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.PROFILE_IMAGE_TIMEOUT)
+            )
+        return self.http_session
+    
+    async def cog_load(self):
+        """Start checkpointing active streams and flushing stream sessions"""
+        self.checkpoint_active_streams.start()
+        self.flush_stream_sessions.change_interval(seconds=self.SESSION_FLUSH_INTERVAL)
+        self.flush_stream_sessions.start()
+        if TWITCH_POLL_ENABLED:
+            self.poll_twitch_streams.change_interval(seconds=self.twitch_poll_interval)
+            self.poll_twitch_streams.start()
+    
+    async def cog_unload(self):
+        """Write pending data and close the shared HTTP session"""
+        self.checkpoint_active_streams.cancel()
+        self.flush_stream_sessions.cancel()
+        self.poll_twitch_streams.cancel()
+        if self.reconcile_stops_task:
+            self.reconcile_stops_task.cancel()
+        self.settle_stopped_streams(force=True)
+        if self.session_write_tasks:
+            await asyncio.gather(*self.session_write_tasks, return_exceptions=True)
+        await self.write_stream_sessions()
+        await self.announcements.close()
+        self.save_active_streams()
+        await self.active_streams_store.close()
+        self.save_stream_cooldowns()
+        await self.stream_cooldowns_store.close()
+        await self.streams_store.close()
+        
+        if self.http_session:
+            await self.http_session.close()
+            self.http_session = None
     
     def save_streams(self):
-        """Save stream links data to JSON file"""
-        try:
-            with open(self.streams_file, 'w') as f:
-                json.dump(self.streams_data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving stream links: {e}")
+        """Queue stream links data to be written to JSON file"""
+        self.streams_store.mark_dirty()
     
-    def load_stream_channel(self):
-        """Load stream channel data from JSON file"""
-        if os.path.exists(self.stream_channel_file):
-            try:
-                with open(self.stream_channel_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading stream channel: {e}")
-                return {"guilds": {}}
-        else:
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(self.stream_channel_file), exist_ok=True)
-            return {"guilds": {}}
+    def claim_stream_start(self, user_id, guild_id):
+        """Claim a stream start for announcing, returning False if one was handled moments ago"""
+        bucket = int(time.time() // self.STREAM_START_BUCKET)
+        # The previous bucket is checked too so starts straddling a bucket boundary still collide
+        if (user_id, guild_id, bucket) in self.handled_stream_starts or (user_id, guild_id, bucket - 1) in self.handled_stream_starts:
+            return False
+        
+        self.handled_stream_starts = {key for key in self.handled_stream_starts if key[2] >= bucket - 1}
+        self.handled_stream_starts.add((user_id, guild_id, bucket))
+        return True
+    
+    def save_active_streams(self):
+        """Queue a checkpoint of active streams if they changed since the last one"""
+        snapshot = {str(user_id): stream_info for user_id, stream_info in self.active_streams.items()}
+        if snapshot != self.active_streams_store.data.get("streams"):
+            self.active_streams_store.data["streams"] = snapshot
+            self.active_streams_store.mark_dirty()
+    
+    def save_stream_cooldowns(self):
+        """Queue a checkpoint of stream cooldowns if they changed since the last one"""
+        snapshot = self.stream_cooldowns.to_dict()
+        if snapshot != self.stream_cooldowns_store.data.get("cooldowns"):
+            self.stream_cooldowns_store.data["cooldowns"] = snapshot
+            self.stream_cooldowns_store.mark_dirty()
+    
+    @tasks.loop(minutes=1)
+    async def checkpoint_active_streams(self):
+        """Periodically checkpoint active streams and stream cooldowns to disk"""
+        self.save_active_streams()
+        self.save_stream_cooldowns()
     
-    def save_stream_channel(self):
-        """Save stream channel data to JSON file"""
+    def record_stream_session(self, user_id, stream_info, ended_at):
+        """Buffer a completed stream session, writing the batch once it is full"""
+        started_at = stream_info["started_at"]
+        self.session_buffer.append({
+            # Generated here so a retried batch upserts the same rows instead of duplicating them
+            "id": str(uuid.uuid4()),
+            "user_id": int(user_id),
+            "guild_id": stream_info.get("guild_id"),
+            "started_at": datetime.fromtimestamp(started_at, tz=timezone.utc).isoformat(),
+            "ended_at": datetime.fromtimestamp(ended_at, tz=timezone.utc).isoformat(),
+            "duration_seconds": max(0, int(ended_at - started_at)),
+            "source": stream_info.get("source", "presence")
+        })
+        if len(self.session_buffer) >= self.SESSION_BATCH_SIZE:
+            task = asyncio.create_task(self.write_stream_sessions())
+            self.session_write_tasks.add(task)
+            task.add_done_callback(self.session_write_tasks.discard)
+    
+    async def write_stream_sessions(self):
+        """Upsert every buffered stream session in one request"""
+        if not self.session_buffer or not self.db:
+            return
+        batch, self.session_buffer = self.session_buffer, []
         try:
-            with open(self.stream_channel_file, 'w') as f:
-                json.dump(self.stream_channel_data, f, indent=2)
+            await self.db.insert_stream_sessions(batch)
+            logger.info(f"Recorded {len(batch)} stream session(s)")
         except Exception as e:
-            logger.error(f"Error saving stream channel: {e}")
+            logger.error(f"Error recording stream sessions: {e}")
+            # Keep the rows for the next flush, dropping the oldest if the database stays down
+            self.session_buffer = (batch + self.session_buffer)[-self.SESSION_BUFFER_LIMIT:]
+    
+    @tasks.loop(seconds=60)
+    async def flush_stream_sessions(self):
+        """Periodically write buffered stream sessions"""
+        self.settle_stopped_streams()
+        await self.write_stream_sessions()
+    
+    async def get_league_mention(self, guild):
+        """Return the mention for the guild's league role"""
+        await self.bot.settings.ensure_loaded(guild.id)
+        league_role = self.bot.settings.get_role(guild, LEAGUE_ROLE, "League")
+        return league_role.mention if league_role else "@League"
     
-    def get_stream_channel(self, guild_id):
+    async def queue_stream_announcement(self, guild, embed, source_channel=None):
+        """Queue an announcement for the guild's stream channel, unless it was posted there already"""
+        channel_id = await self.get_stream_channel(guild.id)
+        if not channel_id:
+            logger.warning(f"No stream channel set for {guild.name}, skipping announcement (use /setstreamchannel)")
+            return
+        if source_channel and int(channel_id) == source_channel.id:
+            return
+        
+        channel = guild.get_channel(int(channel_id))
+        if not channel:
+            logger.warning(f"Stream channel {channel_id} not found in {guild.name}")
+            return
+        self.announcements.enqueue(channel, embed, await self.get_league_mention(guild))
+    
+    async def get_stream_channel(self, guild_id):
         """Get designated stream channel for a guild"""
-        return self.stream_channel_data.get("guilds", {}).get(str(guild_id))
+        await self.bot.settings.ensure_loaded(guild_id)
+        channel_id = self.bot.settings.get(guild_id, STREAM_CHANNEL)
+        if channel_id:
+            return channel_id
+        channel_id = self.stream_channel_data.get("guilds", {}).get(str(guild_id))
+        if channel_id:
+            return channel_id
+        
+        # Fall back to the league's original announcement channel if it belongs to this guild
+        default_channel = self.bot.get_channel(DEFAULT_STREAM_CHANNEL_ID)
+        if default_channel and default_channel.guild.id == int(guild_id):
+            return default_channel.id
+        return None
     
-    def set_stream_channel(self, guild_id, channel_id):
+    async def set_stream_channel(self, guild_id, channel_id):
         """Set designated stream channel for a guild"""
-        if "guilds" not in self.stream_channel_data:
-            self.stream_channel_data["guilds"] = {}
-        
-        self.stream_channel_data["guilds"][str(guild_id)] = channel_id
-        self.save_stream_channel()
+        await self.bot.settings.set(guild_id, STREAM_CHANNEL, channel_id)
     
     async def get_user_points(self, user_id):
         """Get user's current points from the Supabase points system"""
@@ -98,17 +262,29 @@ class StreamManager(commands.Cog):
             logger.error(f"Error getting user points from Supabase: {e}")
             return 0
     
-    async def get_user_stream_points(self, user_id):
-        """Get user's current stream points from Supabase"""
+    def cache_user_points(self, user_id, total_points):
+        """Keep the points system's balance cache in step with writes made here"""
+        points_cog = self.bot.get_cog('PointsSystemSupabase')
+        if points_cog:
+            points_cog.cache_user_points(user_id, total_points)
+    
+    async def award_stream_points(self, user_id, points_to_add, display_name=None, username=None):
+        """Award capped stream points and return (total_points, stream_points), or (0, 0) on failure"""
         try:
-            from config.supabase_config import supabase
-            response = supabase.table("users").select("stream_points").eq("id", str(user_id)).execute()
-            if response.data and len(response.data) > 0:
-                return response.data[0].get("stream_points", 0)
-            return 0
+            points_added, stream_points, total_points = await self.db.award_stream_points(
+                user_id, points_to_add, self.STREAM_POINTS_CAP, display_name, username
+            )
+            self.cache_user_points(user_id, total_points)
+            self.stream_cooldowns.start(int(user_id))
+            
+            if points_added:
+                logger.info(f"Added {points_added} stream points to user {user_id}. Stream points: {stream_points}/{self.STREAM_POINTS_CAP}, Total: {total_points}")
+            else:
+                logger.info(f"User {user_id} has reached stream points limit ({self.STREAM_POINTS_CAP}), not adding more stream points")
+            return total_points, stream_points
         except Exception as e:
-            logger.error(f"Error getting user stream points from Supabase: {e}")
-            return 0
+            logger.error(f"Error awarding stream points via Supabase: {e}")
+            return 0, 0
 
     def get_team_info(self, user_id, guild):
         """Get team claim info for a user"""
@@ -134,105 +310,22 @@ class StreamManager(commands.Cog):
             logger.error(f"Error getting team info for user {user_id}: {e}")
             return None, None
     
-    async def check_stream_cooldown(self, user_id):
-        """Check if user is on cooldown for stream points"""
-        try:
-            # Import Supabase client
-            from config.supabase_config import supabase
-            
-            # Get user's stream points from Supabase
-            result = supabase.table("users").select("stream_points").eq("id", user_id).execute()
-            
-            if result.data:
-                user_data = result.data[0]
-                stream_points = user_data.get("stream_points", 0)
-                
-                # If user has reached the 8 point limit, they can still stream but won't get more points
-                # This effectively removes the cooldown once they hit the limit
-                if stream_points >= 8:
-                    return True, 0  # No cooldown, but no more points
-                
-                # For users under 8 points, we'll use a simple approach
-                # Since we don't have point_history, we'll allow streaming
-                # The cooldown is handled by the 45-minute limit in the main stream detection
-                return True, 0  # No cooldown
-            return True, 0  # No user data, no cooldown
-        except Exception as e:
-            logger.error(f"Error checking stream cooldown: {e}")
-            return True, 0  # Default to no cooldown on error
+    def check_stream_cooldown(self, user_id):
+        """Check if user is on cooldown for stream points, returning (can_stream, seconds remaining)"""
+        remaining_time = self.stream_cooldowns.remaining(int(user_id))
+        return remaining_time <= 0, remaining_time
     
     async def add_user_points(self, user_id, points_to_add, point_type="stream"):
         """Add points to user's account using Supabase"""
         try:
-            # Import Supabase client
-            from config.supabase_config import supabase
-            
             if point_type == "stream":
-                # Check current stream points
-                result = supabase.table("users").select("stream_points, total_points").eq("id", str(user_id)).execute()
-                
-                if result.data:
-                    current_stream_points = result.data[0].get("stream_points", 0)
-                    current_total_points = result.data[0].get("total_points", 0)
-                    
-                    # Check if user has reached the 8 stream points limit
-                    if current_stream_points >= 8:
-                        logger.info(f"User {user_id} has reached stream points limit (8), not adding more stream points")
-                        return current_total_points  # Return current total without adding
-                    
-                    # Calculate new values
-                    new_stream_points = min(current_stream_points + points_to_add, 8)  # Cap at 8
-                    points_actually_added = new_stream_points - current_stream_points
-                    new_total_points = current_total_points + points_actually_added
-                    
-                    # Update both stream_points and total_points
-                    supabase.table("users").upsert(
-                        {
-                            "id": str(user_id), 
-                            "stream_points": new_stream_points,
-                            "total_points": new_total_points
-                        },
-                        on_conflict="id"
-                    ).execute()
-                    
-                    logger.info(f"Added {points_actually_added} stream points to user {user_id}. Stream points: {new_stream_points}/8, Total: {new_total_points}")
-                    
-                    # Verify the update worked by reading back from database
-                    verify_result = supabase.table("users").select("stream_points, total_points").eq("id", str(user_id)).execute()
-                    if verify_result.data:
-                        verified_stream_points = verify_result.data[0].get("stream_points", 0)
-                        verified_total_points = verify_result.data[0].get("total_points", 0)
-                        logger.info(f"Verified database values - Stream: {verified_stream_points}, Total: {verified_total_points}")
-                    
-                    return new_total_points
-                else:
-                    # User doesn't exist, create them
-                    new_stream_points = min(points_to_add, 8)
-                    supabase.table("users").upsert(
-                        {
-                            "id": str(user_id), 
-                            "stream_points": new_stream_points,
-                            "total_points": new_stream_points
-                        },
-                        on_conflict="id"
-                    ).execute()
-                    
-                    logger.info(f"Created new user {user_id} with {new_stream_points} stream points")
-                    
-                    # Verify the creation worked by reading back from database
-                    verify_result = supabase.table("users").select("stream_points, total_points").eq("id", str(user_id)).execute()
-                    if verify_result.data:
-                        verified_stream_points = verify_result.data[0].get("stream_points", 0)
-                        verified_total_points = verify_result.data[0].get("total_points", 0)
-                        logger.info(f"Verified new user database values - Stream: {verified_stream_points}, Total: {verified_total_points}")
-                    
-                    return new_stream_points
+                new_total, _ = await self.award_stream_points(user_id, points_to_add)
+                return new_total
             else:
                 # For non-stream points, use the regular points system
                 points_cog = self.bot.get_cog('PointsSystemSupabase')
                 if points_cog:
-                    await points_cog.add_user_points(user_id, points_to_add)
-                    new_total = await points_cog.get_user_points(user_id)
+                    _, new_total = await points_cog.add_user_points(user_id, points_to_add)
                     return new_total
                 else:
                     logger.error("PointsSystemSupabase cog not found")
@@ -252,6 +345,7 @@ class StreamManager(commands.Cog):
             self.streams_data["users"] = {}
         
         self.streams_data["users"][str(user_id)] = stream_link
+        self.registered_streamers.add(int(user_id))
         self.save_streams()
     
     def extract_twitch_username(self, twitch_url):
@@ -272,47 +366,55 @@ class StreamManager(commands.Cog):
     
     async def get_twitch_profile_info(self, username):
         """Get Twitch profile information including avatar and details"""
+        return {
+            "username": username,
+            "profile_image": await self.get_twitch_profile_image(username),
+            "display_name": username,
+            "description": f"Twitch streamer {username}"
+        }
+    
+    async def get_twitch_profile_image(self, username):
+        """Return a working Twitch profile image URL for username, or None"""
+        cached = self.profile_image_cache.get(username.lower(), MISSING)
+        if cached is not MISSING:
+            return cached
+        
+        # Try multiple Twitch profile image URL formats
+        profile_image_urls = [
+            f"https://static-cdn.jtvnw.net/jtv_user_pictures/{username}-profile_image-300x300.png",
+            f"https://static-cdn.jtvnw.net/jtv_user_pictures/{username}-profile_image-150x150.png",
+            f"https://static-cdn.jtvnw.net/jtv_user_pictures/{username}-profile_image-70x70.png"
+        ]
+        
+        # Probe every format at once; the first one that answers 200 wins
+        valid_profile_image = None
+        probes = [asyncio.create_task(self._probe_image_url(url)) for url in profile_image_urls]
         try:
-            import aiohttp
-            
-            # Try multiple Twitch profile image URL formats
-            profile_image_urls = [
-                f"https://static-cdn.jtvnw.net/jtv_user_pictures/{username}-profile_image-300x300.png",
-                f"https://static-cdn.jtvnw.net/jtv_user_pictures/{username}-profile_image-150x150.png",
-                f"https://static-cdn.jtvnw.net/jtv_user_pictures/{username}-profile_image-70x70.png"
-            ]
-            
-            # Try to find a valid profile image URL
-            valid_profile_image = None
-            async with aiohttp.ClientSession() as session:
-                for url in profile_image_urls:
-                    try:
-                        async with session.head(url) as response:
-                            if response.status == 200:
-                                valid_profile_image = url
-                                logger.info(f"Found valid Twitch profile image for {username}: {url}")
-                                break
-                    except Exception as e:
-                        logger.debug(f"Failed to validate Twitch profile URL {url}: {e}")
-                        continue
-            
-            if not valid_profile_image:
-                logger.warning(f"No valid Twitch profile image found for {username}")
-            
-            return {
-                "username": username,
-                "profile_image": valid_profile_image,
-                "display_name": username,
-                "description": f"Twitch streamer {username}"
-            }
+            for probe in asyncio.as_completed(probes):
+                url = await probe
+                if url:
+                    valid_profile_image = url
+                    break
+        finally:
+            for probe in probes:
+                probe.cancel()
+        
+        if valid_profile_image:
+            logger.debug(f"Found valid Twitch profile image for {username}: {valid_profile_image}")
+            self.profile_image_cache.set(username.lower(), valid_profile_image)
+        else:
+            logger.warning(f"No valid Twitch profile image found for {username}")
+            self.profile_image_cache.set(username.lower(), None, ttl=self.PROFILE_IMAGE_MISS_TTL)
+        return valid_profile_image
+    
+    async def _probe_image_url(self, url):
+        """HEAD an image URL and return it if it exists"""
+        try:
+            async with self.get_http_session().head(url) as response:
+                return url if response.status == 200 else None
         except Exception as e:
-            logger.error(f"Error getting Twitch profile info: {e}")
-            return {
-                "username": username,
-                "profile_image": None,
-                "display_name": username,
-                "description": f"Twitch streamer {username}"
-            }
+            logger.debug(f"Failed to validate Twitch profile URL {url}: {e}")
+            return None
     
     @app_commands.command(name="addstream", description="Add your Twitch stream link")
     @app_commands.describe(stream_link="Your Twitch stream URL (e.g., https://twitch.tv/yourusername)")
@@ -400,14 +502,8 @@ class StreamManager(commands.Cog):
                 )
                 return
             
-            # Extract username for display
-            username = self.extract_twitch_username(stream_link)
-            
-            # Get Twitch profile info
-            profile_info = await self.get_twitch_profile_info(username)
-            
             # Check stream cooldown
-            can_stream, remaining_time = await self.check_stream_cooldown(interaction.user.id)
+            can_stream, remaining_time = self.check_stream_cooldown(interaction.user.id)
             
             if not can_stream:
                 minutes_remaining = int(remaining_time // 60)
@@ -420,15 +516,26 @@ class StreamManager(commands.Cog):
                 )
                 return
             
+            # Drop the second path (command + auto-detect) for the same stream start
+            if not self.claim_stream_start(interaction.user.id, interaction.guild.id):
+                await interaction.response.send_message(
+                    "✅ Your stream was already announced just now.",
+                    ephemeral=True
+                )
+                return
+            
             # Add points for streaming
             points_earned = 1
-            new_total = await self.add_user_points(interaction.user.id, points_earned, "stream")
+            new_total, current_stream_points = await self.award_stream_points(
+                interaction.user.id, points_earned,
+                display_name=interaction.user.display_name, username=interaction.user.name
+            )
             
-            # Get current stream points for display (AFTER adding points)
-            current_stream_points = await self.get_user_stream_points(interaction.user.id)
+            # Extract username for display
+            username = self.extract_twitch_username(stream_link)
             
-            # Debug logging
-            logger.info(f"Stream points after adding: {current_stream_points}, new_total: {new_total}")
+            # Get Twitch profile info
+            profile_info = await self.get_twitch_profile_info(username)
             
             # Get team info for user
             team_abbrev, team_emoji = self.get_team_info(interaction.user.id, interaction.guild)
@@ -483,71 +590,14 @@ class StreamManager(commands.Cog):
                 logger.warning(f"No profile image available for {username}, using fallback")
                 embed.set_thumbnail(url="https://cdn.discordapp.com/emojis/1009146ff.png")  # Twitch emoji fallback
             
-            # Set footer with updated values
-            embed.set_footer(text=f"Total Points: {new_total:,} | Stream Points: {current_stream_points}/8")
+            # Set footer with the values returned by the award
+            embed.set_footer(text=f"Total Points: {new_total:,} | Stream Points: {current_stream_points}/{self.STREAM_POINTS_CAP}")
             
             # Post in the current channel with league mention
-            league_role = discord.utils.get(interaction.guild.roles, name="League")
-            league_mention = league_role.mention if league_role else "@League"
-            await interaction.response.send_message(content=league_mention, embed=embed)
-            
-            # Cross-post to hardcoded stream channel if different from current channel
-            # Hardcoded channel ID: 1039342527330910265
-            designated_channel_id = 1039342527330910265
-            if designated_channel_id != interaction.channel.id:
-                try:
-                    designated_channel = interaction.guild.get_channel(int(designated_channel_id))
-                    if designated_channel:
-                        # Create a slightly different embed for the designated channel
-                        # Use same team integration for cross-post
-                        if team_emoji and team_abbrev:
-                            cross_post_embed = discord.Embed(
-                                title="🎮 Live Stream Started!",
-                                description=f"{team_emoji} **{interaction.user.display_name}** is now streaming Madden!",
-                                color=0x9146ff,
-                                url=stream_link
-                            )
-                            
-                            cross_post_embed.add_field(
-                                name="🎯 Streamer",
-                                value=f"{team_emoji} **{profile_info['display_name']}**",
-                                inline=True
-                            )
-                        else:
-                            cross_post_embed = discord.Embed(
-                                title="🎮 Live Stream Started!",
-                                description=f"**{interaction.user.display_name}** is now streaming Madden!",
-                                color=0x9146ff,
-                                url=stream_link
-                            )
-                            
-                            cross_post_embed.add_field(
-                                name="🎯 Streamer",
-                                value=f"**{profile_info['display_name']}**",
-                                inline=True
-                            )
-                        
-                        cross_post_embed.add_field(
-                            name="📺 Watch Now",
-                            value=f"[Click here to watch!]({stream_link})",
-                            inline=False
-                        )
-                        
-                        if profile_info['profile_image']:
-                            logger.info(f"Setting cross-post thumbnail for {username}: {profile_info['profile_image']}")
-                            cross_post_embed.set_thumbnail(url=profile_info['profile_image'])
-                        else:
-                            logger.warning(f"No profile image available for {username} in cross-post")
-                            cross_post_embed.set_thumbnail(url="https://cdn.discordapp.com/emojis/1009146ff.png")
-                        
-                        cross_post_embed.set_footer(text=f"Originally posted in #{interaction.channel.name}")
-                        
-                        league_role = discord.utils.get(interaction.guild.roles, name="League")
-                        league_mention = league_role.mention if league_role else "@League"
-                        await designated_channel.send(content=league_mention, embed=cross_post_embed)
-                        
-                except Exception as e:
-                    logger.error(f"Error cross-posting to designated channel: {e}")
+            await interaction.response.send_message(content=await self.get_league_mention(interaction.guild), embed=embed)
+            
+            # Cross-post the same embed to the stream channel if different from current channel
+            await self.queue_stream_announcement(interaction.guild, embed, source_channel=interaction.channel)
             
         except Exception as e:
             logger.error(f"Error in stream_game: {e}")
@@ -668,7 +718,7 @@ class StreamManager(commands.Cog):
             logger.info(f"Setting stream channel: {channel.name} (ID: {channel.id}) in guild {interaction.guild.name}")
             
             # Set the stream channel
-            self.set_stream_channel(interaction.guild.id, channel.id)
+            await self.set_stream_channel(interaction.guild.id, channel.id)
             
             embed = discord.Embed(
                 title="✅ Stream Channel Set!",
@@ -718,6 +768,28 @@ class StreamManager(commands.Cog):
                     ephemeral=True
                 )
     
+    @app_commands.command(name="setleaguerole", description="Set the role mentioned in stream announcements (Commish only)")
+    @app_commands.describe(role="Role to mention when someone goes live")
+    async def set_league_role(self, interaction: discord.Interaction, role: discord.Role):
+        """Set the league role mentioned in stream announcements (Commish only)"""
+        if not await self.has_admin_permission(interaction):
+            await interaction.response.send_message(
+                "❌ You need administrator permissions or the 'commish' role to use this command.",
+                ephemeral=True
+            )
+            return
+        
+        try:
+            await self.bot.settings.set(interaction.guild.id, LEAGUE_ROLE, role.id)
+            logger.info(f"Setting league role: {role.name} (ID: {role.id}) in guild {interaction.guild.name}")
+            await interaction.response.send_message(
+                f"✅ Stream announcements will now mention {role.mention}.",
+                ephemeral=True
+            )
+        except Exception as e:
+            logger.error(f"Error in set_league_role: {e}")
+            await interaction.response.send_message("❌ An error occurred while setting the league role.", ephemeral=True)
+    
     @app_commands.command(name="setstreamchannelid", description="Set stream channel using channel ID")
     @app_commands.describe(channel_id="The ID of the channel (enable Developer Mode, then right-click channel > Copy ID)")
     async def set_stream_channel_by_id(self, interaction: discord.Interaction, channel_id: str):
@@ -800,7 +872,7 @@ class StreamManager(commands.Cog):
             logger.info(f"Setting stream channel by ID: {channel.name} (ID: {channel.id}) in guild {interaction.guild.name}")
             
             # Set the stream channel
-            self.set_stream_channel(interaction.guild.id, channel.id)
+            await self.set_stream_channel(interaction.guild.id, channel.id)
             
             embed = discord.Embed(
                 title="✅ Stream Channel Set!",
@@ -895,7 +967,7 @@ class StreamManager(commands.Cog):
     async def view_stream_channel(self, interaction: discord.Interaction):
         """View the current designated stream channel"""
         try:
-            channel_id = self.get_stream_channel(interaction.guild.id)
+            channel_id = await self.get_stream_channel(interaction.guild.id)
             
             if not channel_id:
                 embed = discord.Embed(
@@ -970,9 +1042,102 @@ class StreamManager(commands.Cog):
                 ephemeral=True
             )
     
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Reconcile checkpointed streams once, after the first connect"""
+        if self.active_streams_reconciled:
+            return
+        self.active_streams_reconciled = True
+        try:
+            unresolved = await self.reconcile_active_streams()
+            if unresolved:
+                self.reconcile_stops_task = asyncio.create_task(self.reconcile_unresolved_stops(unresolved))
+        except Exception as e:
+            logger.error(f"Error reconciling active streams: {e}")
+    
+    def is_streaming(self, member):
+        """Whether a member's cached activities include a Streaming activity"""
+        return any(isinstance(activity, discord.Streaming) for activity in member.activities)
+    
+    async def reconcile_active_streams(self):
+        """Match active_streams to cached presences, returning user IDs whose stop couldn't be confirmed"""
+        live = {}  # {user_id: member}
+        for guild in self.bot.guilds:
+            for member in guild.members:
+                if member.id in self.registered_streamers and member.id not in live and self.is_streaming(member):
+                    live[member.id] = member
+        
+        # Without the members intent the cache only holds members whose presence has arrived,
+        # so a stop is only certain in a fully chunked guild where the member is cached and not
+        # streaming. Streams found by the Twitch poller are left for the poller to end.
+        missed_stops = []
+        unresolved = []
+        for user_id, stream_info in self.active_streams.items():
+            if user_id in live or stream_info.get("source", "presence") != "presence":
+                continue
+            guild = self.bot.get_guild(stream_info.get("guild_id"))
+            member = guild.get_member(user_id) if guild else None
+            if guild and guild.chunked and member:
+                missed_stops.append(member)
+            else:
+                unresolved.append(user_id)
+        missed_starts = [member for user_id, member in live.items() if user_id not in self.active_streams]
+        
+        for member in missed_stops:
+            self.end_stream(member.id, member.display_name)
+        
+        for member in missed_starts:
+            await self.handle_stream_start(member)
+        
+        self.save_active_streams()
+        logger.info(
+            f"Active streams reconciled: {len(self.active_streams)} live, "
+            f"{len(missed_starts)} missed start(s), {len(missed_stops)} missed stop(s), "
+            f"{len(unresolved)} to re-check"
+        )
+        return unresolved
+    
+    async def reconcile_unresolved_stops(self, user_ids):
+        """After a delay, end tracked streams whose member's queried presence isn't streaming"""
+        await asyncio.sleep(self.STREAM_RECONCILE_DELAY)
+        
+        by_guild = {}  # {guild_id: [user_id]}
+        for user_id in user_ids:
+            stream_info = self.active_streams.get(user_id)
+            # Skip streams already ended or restarted by a presence update in the meantime
+            if stream_info and stream_info.get("source", "presence") == "presence":
+                by_guild.setdefault(stream_info.get("guild_id"), []).append(user_id)
+        
+        ended = 0
+        for guild_id, guild_user_ids in by_guild.items():
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                continue
+            for start in range(0, len(guild_user_ids), MEMBER_QUERY_CHUNK):
+                chunk = guild_user_ids[start:start + MEMBER_QUERY_CHUNK]
+                try:
+                    members = await guild.query_members(user_ids=chunk, limit=len(chunk), presences=True, cache=True)
+                except Exception as e:
+                    logger.error(f"Error querying presences in {guild.name}: {e}")
+                    continue
+                # Members not returned (e.g. left the guild) are left for on_presence_update
+                for member in members:
+                    if member.id in self.active_streams and not self.is_streaming(member):
+                        self.end_stream(member.id, member.display_name)
+                        ended += 1
+        
+        if ended:
+            self.save_active_streams()
+        logger.info(f"Re-checked {len(user_ids)} unconfirmed stream(s): {ended} missed stop(s)")
+    
+    @commands.Cog.listener("on_presence_update")
     @commands.Cog.listener()
     async def on_member_update(self, before, after):
         """Detect when a user starts or stops streaming"""
+        # Only members with a registered stream link can be announced
+        if after.id not in self.registered_streamers:
+            return
+        
         try:
             # Check if streaming status changed
             was_streaming = before.activity and isinstance(before.activity, discord.Streaming)
@@ -988,10 +1153,26 @@ class StreamManager(commands.Cog):
         except Exception as e:
             logger.error(f"Error in on_member_update: {e}")
     
-    async def handle_stream_start(self, member):
+    async def handle_stream_start(self, member, source="presence", activity_name=None):
         """Handle when a user starts streaming"""
         try:
-            logger.info(f"User {member.display_name} started streaming: {member.activity.name if member.activity else 'Unknown'}")
+            if activity_name is None:
+                activity_name = member.activity.name if member.activity else "Unknown"
+            
+            if member.id in self.active_streams:
+                logger.debug(f"Ignoring repeat stream start for {member.display_name}")
+                return
+            
+            # A stream that flapped off and on again resumes instead of being announced twice
+            stopped = self.recently_stopped.pop(member.id, None)
+            if stopped:
+                if time.monotonic() - stopped[0] < self.STREAM_FLAP_WINDOW:
+                    self.active_streams[member.id] = stopped[1]
+                    logger.info(f"Resumed stream for {member.display_name} after a brief drop")
+                    return
+                self.record_stream_session(member.id, stopped[1], stopped[2])
+            
+            logger.info(f"User {member.display_name} started streaming: {activity_name}")
             
             # Check if user has registered stream link
             stream_link = self.get_user_stream_link(member.id)
@@ -999,22 +1180,30 @@ class StreamManager(commands.Cog):
                 logger.info(f"User {member.display_name} is streaming but has no registered stream link")
                 return
             
-            # Check cooldown
-            can_stream, remaining_time = await self.check_stream_cooldown(member.id)
+            # Store active stream info
+            self.active_streams[member.id] = {
+                "started_at": time.time(),
+                "activity": activity_name,
+                "guild_id": member.guild.id,
+                "source": source
+            }
+            
+            # Check cooldown; the stream is still tracked, just not announced again
+            can_stream, remaining_time = self.check_stream_cooldown(member.id)
             if not can_stream:
                 logger.info(f"User {member.display_name} is on cooldown, skipping auto-announcement")
                 return
             
+            # Drop the second path (command + auto-detect) for the same stream start
+            if not self.claim_stream_start(member.id, member.guild.id):
+                logger.info(f"Stream start for {member.display_name} was already announced, skipping")
+                return
+            
             # Add points for streaming
             points_earned = 1
-            new_total = await self.add_user_points(member.id, points_earned, "stream")
-            
-            # Store active stream info
-            self.active_streams[member.id] = {
-                "started_at": time.time(),
-                "activity": member.activity.name if member.activity else "Unknown",
-                "guild_id": member.guild.id
-            }
+            new_total, current_stream_points = await self.award_stream_points(
+                member.id, points_earned, display_name=member.display_name, username=member.name
+            )
             
             # Get Twitch profile info
             username = self.extract_twitch_username(stream_link)
@@ -1070,23 +1259,10 @@ class StreamManager(commands.Cog):
             else:
                 embed.set_thumbnail(url="https://cdn.discordapp.com/emojis/1009146ff.png")
             
-            # Get current stream points for display
-            current_stream_points = await self.get_user_stream_points(member.id)
-            embed.set_footer(text=f"Total Points: {new_total:,} | Stream Points: {current_stream_points}/8 | Auto-detected")
+            embed.set_footer(text=f"Total Points: {new_total:,} | Stream Points: {current_stream_points}/{self.STREAM_POINTS_CAP} | Auto-detected")
             
-            # Cross-post to hardcoded stream channel
-            # Hardcoded channel ID: 1039342527330910265
-            designated_channel_id = 1039342527330910265
-            if designated_channel_id:
-                try:
-                    designated_channel = member.guild.get_channel(int(designated_channel_id))
-                    if designated_channel:
-                        league_role = discord.utils.get(member.guild.roles, name="League")
-                        league_mention = league_role.mention if league_role else "@League"
-                        await designated_channel.send(content=league_mention, embed=embed)
-                        logger.info(f"Auto-announced stream for {member.display_name} in {designated_channel.name}")
-                except Exception as e:
-                    logger.error(f"Error posting auto-announcement: {e}")
+            # Announce in the stream channel
+            await self.queue_stream_announcement(member.guild, embed)
             
         except Exception as e:
             logger.error(f"Error handling stream start: {e}")
@@ -1095,16 +1271,127 @@ class StreamManager(commands.Cog):
         """Handle when a user stops streaming"""
         try:
             logger.info(f"User {member.display_name} stopped streaming")
-            
-            # Remove from active streams
-            if member.id in self.active_streams:
-                stream_info = self.active_streams.pop(member.id)
-                duration = time.time() - stream_info["started_at"]
-                logger.info(f"Stream ended for {member.display_name} after {duration:.0f} seconds")
+            self.end_stream(member.id, member.display_name)
             
         except Exception as e:
             logger.error(f"Error handling stream stop: {e}")
     
+    def end_stream(self, user_id, display_name):
+        """Remove a user from active streams; the session is recorded once it can't resume"""
+        if user_id in self.active_streams:
+            stream_info = self.active_streams.pop(user_id)
+            ended_at = time.time()
+            self.remember_stopped_stream(user_id, stream_info, ended_at)
+            logger.info(f"Stream ended for {display_name} after {ended_at - stream_info['started_at']:.0f} seconds")
+    
+    def remember_stopped_stream(self, user_id, stream_info, ended_at):
+        """Keep a stopped stream briefly so a quick restart can resume it"""
+        self.settle_stopped_streams()
+        self.recently_stopped[user_id] = (time.monotonic(), stream_info, ended_at)
+    
+    def settle_stopped_streams(self, force=False):
+        """Record sessions for stopped streams that can no longer resume"""
+        now = time.monotonic()
+        for user_id, (stopped_at, stream_info, ended_at) in list(self.recently_stopped.items()):
+            if force or now - stopped_at >= self.STREAM_FLAP_WINDOW:
+                del self.recently_stopped[user_id]
+                self.record_stream_session(user_id, stream_info, ended_at)
+    
+    @tasks.loop(seconds=60)
+    async def poll_twitch_streams(self):
+        """Check registered Twitch logins for live streams and feed the start/stop handlers"""
+        try:
+            logins = {}  # {login: [user_id]}
+            for user_id, stream_link in self.streams_data.get("users", {}).items():
+                username = self.extract_twitch_username(stream_link)
+                if username:
+                    logins.setdefault(username.lower(), []).append(int(user_id))
+            if not logins:
+                return
+            
+            live = await self.fetch_live_twitch_streams(list(logins))
+            if live is None:
+                # Request failed or was rate limited; back off
+                self.set_twitch_poll_interval(self.twitch_poll_interval * 2)
+                return
+            
+            live_user_ids = {}  # {user_id: stream title}
+            for login, stream in live.items():
+                for user_id in logins.get(login, []):
+                    live_user_ids[user_id] = stream.get("title") or stream.get("game_name") or "Twitch"
+            
+            transitions = 0
+            
+            # Streams this poller started that are no longer live
+            for user_id, stream_info in list(self.active_streams.items()):
+                if stream_info.get("source") == "twitch" and user_id not in live_user_ids:
+                    member = None
+                    guild = self.bot.get_guild(stream_info.get("guild_id"))
+                    if guild:
+                        member = guild.get_member(user_id)
+                    self.end_stream(user_id, member.display_name if member else f"User {user_id}")
+                    transitions += 1
+            
+            # Live on Twitch but not already tracked (e.g. no Discord Streaming presence)
+            new_user_ids = [user_id for user_id in live_user_ids if user_id not in self.active_streams]
+            if new_user_ids:
+                for guild in self.bot.guilds:
+                    # Members only: non-members are cached as misses, so no users-table query per tick
+                    members = await self.member_resolver.get_members(guild, new_user_ids, include_external=False)
+                    for user_id, member in members.items():
+                        if user_id not in self.active_streams:
+                            await self.handle_stream_start(member, source="twitch", activity_name=live_user_ids[user_id])
+                            transitions += 1
+            
+            # Poll quickly while anyone is live or things are changing, slow down when quiet
+            if live_user_ids or transitions:
+                self.set_twitch_poll_interval(TWITCH_POLL_MIN_INTERVAL)
+            else:
+                self.set_twitch_poll_interval(self.twitch_poll_interval * 2)
+            
+        except Exception as e:
+            logger.error(f"Error polling Twitch streams: {e}")
+    
+    @poll_twitch_streams.before_loop
+    async def before_poll_twitch_streams(self):
+        """Wait for the guild caches before the first poll"""
+        await self.bot.wait_until_ready()
+    
+    def set_twitch_poll_interval(self, seconds):
+        """Change the Twitch poll interval, kept within the configured bounds"""
+        seconds = max(TWITCH_POLL_MIN_INTERVAL, min(seconds, TWITCH_POLL_MAX_INTERVAL))
+        if seconds != self.twitch_poll_interval:
+            self.twitch_poll_interval = seconds
+            self.poll_twitch_streams.change_interval(seconds=seconds)
+            logger.debug(f"Twitch poll interval is now {seconds}s")
+    
+    async def fetch_live_twitch_streams(self, logins):
+        """Return {login: stream} for the live logins, 100 per request, or None on failure"""
+        headers = {}
+        if TWITCH_CLIENT_ID:
+            headers["Client-Id"] = TWITCH_CLIENT_ID
+        if TWITCH_ACCESS_TOKEN:
+            headers["Authorization"] = f"Bearer {TWITCH_ACCESS_TOKEN}"
+        
+        live = {}
+        for start in range(0, len(logins), self.TWITCH_LOGINS_PER_REQUEST):
+            chunk = logins[start:start + self.TWITCH_LOGINS_PER_REQUEST]
+            params = [("user_login", login) for login in chunk] + [("first", str(len(chunk)))]
+            try:
+                async with self.get_http_session().get(TWITCH_STREAMS_URL, params=params, headers=headers) as response:
+                    if response.status != 200:
+                        logger.warning(f"Twitch streams request returned {response.status}")
+                        return None
+                    payload = await response.json()
+            except Exception as e:
+                logger.error(f"Error requesting Twitch streams: {e}")
+                return None
+            
+            for stream in payload.get("data", []):
+                if stream.get("type", "live") == "live" and stream.get("user_login"):
+                    live[stream["user_login"].lower()] = stream
+        return live
+    
     @app_commands.command(name="streamdiscord", description="Verify you're streaming in Discord and earn points!")
     async def stream_discord(self, interaction: discord.Interaction):
         """Verify user is streaming in Discord and give points"""
@@ -1141,7 +1428,7 @@ class StreamManager(commands.Cog):
                 return
             
             # Check stream cooldown
-            can_stream, remaining_time = await self.check_stream_cooldown(interaction.user.id)
+            can_stream, remaining_time = self.check_stream_cooldown(interaction.user.id)
             
             if not can_stream:
                 minutes_remaining = int(remaining_time // 60)
@@ -1154,13 +1441,23 @@ class StreamManager(commands.Cog):
                 )
                 return
             
+            # Drop the second path (command + auto-detect) for the same stream start
+            if not self.claim_stream_start(interaction.user.id, interaction.guild.id):
+                await interaction.response.send_message(
+                    "✅ Your stream was already announced just now.",
+                    ephemeral=True
+                )
+                return
+            
             # Add points for streaming
             points_earned = 1
-            new_total = await self.add_user_points(interaction.user.id, points_earned, "stream")
+            new_total, current_stream_points = await self.award_stream_points(
+                interaction.user.id, points_earned,
+                display_name=interaction.user.display_name, username=interaction.user.name
+            )
             
             # Get stream info
             stream_activity = interaction.user.activity
-            stream_name = stream_activity.name if stream_activity else "Unknown"
             stream_url = stream_activity.url if stream_activity else None
             
             # Get team info for user
@@ -1237,57 +1534,12 @@ class StreamManager(commands.Cog):
                 # No registered stream link, use Discord icon
                 embed.set_thumbnail(url="https://cdn.discordapp.com/emojis/1009146ff.png")
             
-            # Get current stream points for display
-            current_stream_points = await self.get_user_stream_points(interaction.user.id)
-            embed.set_footer(text=f"Total Points: {new_total:,} | Stream Points: {current_stream_points}/8")
+            embed.set_footer(text=f"Total Points: {new_total:,} | Stream Points: {current_stream_points}/{self.STREAM_POINTS_CAP}")
             
-            # Cross-post to hardcoded stream channel if different from current channel
-            # Hardcoded channel ID: 1039342527330910265
-            designated_channel_id = 1039342527330910265
-            if designated_channel_id != interaction.channel.id:
-                try:
-                    designated_channel = interaction.guild.get_channel(int(designated_channel_id))
-                    if designated_channel:
-                        # Create cross-post embed with team integration
-                        if team_emoji and team_abbrev:
-                            cross_post_embed = discord.Embed(
-                                title="🎮 Discord Stream Started!",
-                                description=f"{team_emoji} **{interaction.user.display_name}** is streaming in Discord!",
-                                color=0x9146ff,
-                                url=stream_url
-                            )
-                        else:
-                            cross_post_embed = discord.Embed(
-                                title="🎮 Discord Stream Started!",
-                                description=f"**{interaction.user.display_name}** is streaming in Discord!",
-                                color=0x9146ff,
-                                url=stream_url
-                            )
-                        
-                        cross_post_embed.add_field(
-                            name="🎮 Stream Activity",
-                            value=f"**{stream_name}**",
-                            inline=True
-                        )
-                        
-                        cross_post_embed.add_field(
-                            name="📺 Watch Now",
-                            value=f"[Click here to watch!](https://discord.com/channels/1039342526206844980/1167311841668632607)",
-                            inline=False
-                        )
-                        
-                        cross_post_embed.set_footer(text=f"Originally posted in #{interaction.channel.name}")
-                        
-                        league_role = discord.utils.get(interaction.guild.roles, name="League")
-                        league_mention = league_role.mention if league_role else "@League"
-                        await designated_channel.send(content=league_mention, embed=cross_post_embed)
-                        
-                except Exception as e:
-                    logger.error(f"Error cross-posting Discord stream: {e}")
+            await interaction.response.send_message(content=await self.get_league_mention(interaction.guild), embed=embed)
             
-            league_role = discord.utils.get(interaction.guild.roles, name="League")
-            league_mention = league_role.mention if league_role else "@League"
-            await interaction.response.send_message(content=league_mention, embed=embed)
+            # Cross-post the same embed to the stream channel if different from current channel
+            await self.queue_stream_announcement(interaction.guild, embed, source_channel=interaction.channel)
             
         except Exception as e:
             logger.error(f"Error in stream_discord: {e}")
@@ -1341,7 +1593,7 @@ class StreamManager(commands.Cog):
                 ephemeral=True
             )
 
-    def has_admin_permission(self, interaction):
+    async def has_admin_permission(self, interaction):
         """Check if user has commish role or administrator permissions"""
         # Check if user has administrator permission
         if interaction.user.guild_permissions.administrator:
@@ -1349,7 +1601,8 @@ class StreamManager(commands.Cog):
             return True
         
         # Check if user has commish role
-        commish_role = discord.utils.get(interaction.guild.roles, name="commish")
+        await self.bot.settings.ensure_loaded(interaction.guild.id)
+        commish_role = self.bot.settings.get_role(interaction.guild, COMMISH_ROLE, "commish")
         if commish_role and commish_role in interaction.user.roles:
             logger.info(f"Allowing {interaction.user.display_name} to use admin commands (@commish role)")
             return True
@@ -1360,7 +1613,7 @@ class StreamManager(commands.Cog):
     @app_commands.command(name="debugroles", description="Debug: List all roles in the server (Admin only)")
     async def debug_roles(self, interaction: discord.Interaction):
         """Debug command to list all roles in the server"""
-        if not self.has_admin_permission(interaction):
+        if not await self.has_admin_permission(interaction):
             await interaction.response.send_message(
                 "❌ You need administrator permissions or the 'commish' role to use this command.", 
                 ephemeral=True
@@ -1383,7 +1636,7 @@ class StreamManager(commands.Cog):
             )
             
             # Check specifically for league role
-            league_role = discord.utils.get(interaction.guild.roles, name="League")
+            league_role = self.bot.settings.get_role(interaction.guild, LEAGUE_ROLE, "League")
             if league_role:
                 embed.add_field(
                     name="✅ League Role Found",
@@ -1410,7 +1663,7 @@ class StreamManager(commands.Cog):
     @app_commands.describe(user="User to add stream point to")
     async def add_stream_point(self, interaction: discord.Interaction, user: discord.Member):
         """Add a stream point to a specific user (Commish only)"""
-        if not self.has_admin_permission(interaction):
+        if not await self.has_admin_permission(interaction):
             await interaction.response.send_message(
                 "❌ You need administrator permissions or the 'commish' role to use this command.", 
                 ephemeral=True
@@ -1418,50 +1671,12 @@ class StreamManager(commands.Cog):
             return
         
         try:
-            # Import Supabase client
-            from config.supabase_config import supabase
-            
-            # Get current stream points and total points
-            result = supabase.table("users").select("stream_points, total_points").eq("id", str(user.id)).execute()
-            
-            if result.data:
-                current_stream_points = result.data[0].get("stream_points", 0)
-                current_total_points = result.data[0].get("total_points", 0)
-                
-                # Add 1 stream point (bypassing the 8-point limit for corrections)
-                new_stream_points = current_stream_points + 1
-                new_total_points = current_total_points + 1
-                
-                # Update both stream_points and total_points
-                supabase.table("users").upsert(
-                    {
-                        "id": str(user.id), 
-                        "stream_points": new_stream_points,
-                        "total_points": new_total_points
-                    },
-                    on_conflict="id"
-                ).execute()
-                
-                logger.info(f"Manually added 1 stream point to user {user.id}. Stream points: {new_stream_points}, Total: {new_total_points}")
-                
-            else:
-                # User doesn't exist, create them with 1 stream point
-                new_stream_points = 1
-                new_total_points = 1
-                supabase.table("users").upsert(
-                    {
-                        "id": str(user.id), 
-                        "stream_points": new_stream_points,
-                        "total_points": new_total_points
-                    },
-                    on_conflict="id"
-                ).execute()
-                
-                logger.info(f"Created new user {user.id} with 1 stream point")
-            
-            # Get final values for display
-            current_stream_points = new_stream_points
-            new_total = new_total_points
+            # Add 1 stream point (bypassing the 8-point limit for corrections)
+            _, current_stream_points, new_total = await self.db.award_stream_points(
+                user.id, 1, None, user.display_name, user.name
+            )
+            self.cache_user_points(user.id, new_total)
+            logger.info(f"Manually added 1 stream point to user {user.id}. Stream points: {current_stream_points}, Total: {new_total}")
             
             embed = discord.Embed(
                 title="🎯 Stream Point Added",
@@ -1471,7 +1686,7 @@ class StreamManager(commands.Cog):
             
             embed.add_field(
                 name="Stream Points",
-                value=f"**{min(current_stream_points, 8)}/8**",
+                value=f"**{min(current_stream_points, self.STREAM_POINTS_CAP)}/{self.STREAM_POINTS_CAP}**",
                 inline=True
             )
             
@@ -148,17 +148,12 @@ class TeamClaimSystem(commands.Cog):
             logger.error(f"❌ TeamClaimSystem: Failed to load teams data: {e}")
             self.teams = {}
         
-        # Import Supabase client
-        try:
-            from config.supabase_config import supabase
-            self.supabase = supabase
+        # Shared Supabase repository (created once by the bot)
+        self.db = bot.db
+        if self.db:
             logger.info("✅ TeamClaimSystem: Supabase client loaded")
-        except ImportError as e:
-            logger.error(f"❌ TeamClaimSystem: Supabase config not found: {e}")
-            self.supabase = None
-        except Exception as e:
-            logger.error(f"❌ TeamClaimSystem: Failed to load Supabase client: {e}")
-            self.supabase = None
+        else:
+            logger.error("❌ TeamClaimSystem: Supabase client not configured")
         
         logger.info("✅ TeamClaimSystem cog initialized")
 
@@ -254,7 +249,7 @@ class TeamClaimSystem(commands.Cog):
 
     async def claim_team(self, interaction: discord.Interaction, team_abbrev: str):
         """Process team claim"""
-        if not self.supabase:
+        if not self.db:
             await interaction.followup.send("❌ Database connection error. Please try again later.", ephemeral=True)
             return
         
@@ -320,9 +315,9 @@ class TeamClaimSystem(commands.Cog):
     async def get_user_team(self, user_id):
         """Get the team claimed by a user"""
         try:
-            result = self.supabase.table("team_claims").select("team_abbreviation").eq("user_id", str(user_id)).execute()
-            if result.data and len(result.data) > 0:
-                return result.data[0]["team_abbreviation"]
+            claim = await self.db.get_team_claim_by_user(user_id, "team_abbreviation")
+            if claim:
+                return claim["team_abbreviation"]
             return None
         except Exception as e:
             logger.error(f"Error getting user team for {user_id}: {e}")
@@ -331,9 +326,9 @@ class TeamClaimSystem(commands.Cog):
     async def get_team_claim(self, team_abbrev):
         """Get the user who claimed a team"""
         try:
-            result = self.supabase.table("team_claims").select("user_id").eq("team_abbreviation", team_abbrev.upper()).execute()
-            if result.data and len(result.data) > 0:
-                return result.data[0]["user_id"]
+            claim = await self.db.get_team_claim_by_team(team_abbrev, "user_id")
+            if claim:
+                return claim["user_id"]
             return None
         except Exception as e:
             logger.error(f"Error getting team claim for {team_abbrev}: {e}")
@@ -343,10 +338,10 @@ class TeamClaimSystem(commands.Cog):
         """Save or update a team claim"""
         try:
             # First, remove any existing claim by this user
-            self.supabase.table("team_claims").delete().eq("user_id", str(user_id)).execute()
+            await self.db.delete_team_claims_by_user(user_id)
             
             # Then, remove any existing claim for this team
-            self.supabase.table("team_claims").delete().eq("team_abbreviation", team_abbrev.upper()).execute()
+            await self.db.delete_team_claim_by_team(team_abbrev)
             
             # Insert the new claim
             claim_data = {
@@ -357,7 +352,7 @@ class TeamClaimSystem(commands.Cog):
                 "claimed_at": datetime.now().isoformat()
             }
             
-            result = self.supabase.table("team_claims").insert(claim_data).execute()
+            await self.db.insert_team_claim(claim_data)
             logger.info(f"User {user_id} claimed team {team_abbrev}")
             return True
         except Exception as e:
@@ -367,10 +362,7 @@ class TeamClaimSystem(commands.Cog):
     async def get_team_claimed_user(self, team_abbrev):
         """Get the user who claimed a specific team"""
         try:
-            result = self.supabase.table("team_claims").select("user_id, display_name").eq("team_abbreviation", team_abbrev.upper()).execute()
-            if result.data and len(result.data) > 0:
-                return result.data[0]
-            return None
+            return await self.db.get_team_claim_by_team(team_abbrev, "user_id, display_name")
         except Exception as e:
             logger.error(f"Error getting team claimed user for {team_abbrev}: {e}")
             return None
@@ -378,14 +370,14 @@ class TeamClaimSystem(commands.Cog):
     @app_commands.command(name="teamslist", description="List all NFL teams and their claimed status")
     async def teams_list(self, interaction: discord.Interaction):
         """List all teams and show who has claimed them"""
-        if not self.supabase:
+        if not self.db:
             await interaction.response.send_message("❌ Database connection error. Please try again later.", ephemeral=True)
             return
         
         try:
             # Get all team claims
-            claims_result = self.supabase.table("team_claims").select("team_abbreviation, display_name").execute()
-            claims_dict = {claim["team_abbreviation"]: claim["display_name"] for claim in claims_result.data}
+            claims = await self.db.list_team_claims("team_abbreviation, display_name")
+            claims_dict = {claim["team_abbreviation"]: claim["display_name"] for claim in claims}
             
             # Create embed
             embed = discord.Embed(
@@ -465,7 +457,7 @@ class TeamClaimSystem(commands.Cog):
             await interaction.response.send_message("❌ This command is only available to administrators.", ephemeral=True)
             return
         
-        if not self.supabase:
+        if not self.db:
             await interaction.response.send_message("❌ Database connection error. Please try again later.", ephemeral=True)
             return
         
@@ -478,17 +470,17 @@ class TeamClaimSystem(commands.Cog):
         
         try:
             # Check if team is claimed
-            claim_result = self.supabase.table("team_claims").select("user_id, display_name").eq("team_abbreviation", team_abbrev).execute()
+            claim = await self.db.get_team_claim_by_team(team_abbrev, "user_id, display_name")
             
-            if not claim_result.data:
+            if not claim:
                 await interaction.response.send_message(f"❌ **{team_data['name']}** is not currently claimed.", ephemeral=True)
                 return
             
             # Remove the claim
-            self.supabase.table("team_claims").delete().eq("team_abbreviation", team_abbrev).execute()
+            await self.db.delete_team_claim_by_team(team_abbrev)
             
             emoji = self.get_team_emoji(interaction.guild, team_abbrev)
-            claimed_by = claim_result.data[0]["display_name"]
+            claimed_by = claim["display_name"]
             
             embed = discord.Embed(
                 title="🏈 Team Claim Removed",
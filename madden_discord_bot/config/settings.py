@@ -10,6 +10,24 @@ GUILD_ID = None  # We'll set this later, or leave None for global commands
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
+# Stream announcement channel used when a guild hasn't run /setstreamchannel
+# (only applies to the guild that owns the channel)
+DEFAULT_STREAM_CHANNEL_ID = int(os.getenv('DEFAULT_STREAM_CHANNEL_ID', '1039342527330910265'))
+
+# Twitch live-status polling (any Helix "Get Streams"-compatible endpoint)
+TWITCH_CLIENT_ID = os.getenv('TWITCH_CLIENT_ID')
+TWITCH_ACCESS_TOKEN = os.getenv('TWITCH_ACCESS_TOKEN')  # app access token
+TWITCH_STREAMS_URL = os.getenv('TWITCH_STREAMS_URL', 'https://api.twitch.tv/helix/streams')
+TWITCH_POLL_ENABLED = bool(TWITCH_CLIENT_ID or os.getenv('TWITCH_STREAMS_URL'))
+TWITCH_POLL_MIN_INTERVAL = int(os.getenv('TWITCH_POLL_MIN_INTERVAL', '60'))  # seconds
+TWITCH_POLL_MAX_INTERVAL = int(os.getenv('TWITCH_POLL_MAX_INTERVAL', '600'))  # seconds
+
+# GOTW poll cards are edited at most once per this many seconds per poll
+GOTW_MESSAGE_EDIT_INTERVAL = float(os.getenv('GOTW_MESSAGE_EDIT_INTERVAL', '5'))
+
+# How often to re-check which GOTW database functions are deployed; 0 = only at startup
+GOTW_RPC_PROBE_INTERVAL = int(os.getenv('GOTW_RPC_PROBE_INTERVAL', '3600'))  # seconds
+
 # Trade Calculator Settings (we'll expand this)
 TRADE_CALC_WEIGHTS = {
     'age': 0.15,
@@ -4,6 +4,7 @@ Supabase configuration for the Franchise Player Bot
 import os
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from supabase.client import ClientOptions
 
 load_dotenv()
 
@@ -12,8 +13,22 @@ SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
 SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')  # For admin operations
 
-# Create Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY) if SUPABASE_URL and SUPABASE_ANON_KEY else None
+# Connection settings
+CONNECTION_SETTINGS = {
+    'timeout': 30,  # seconds
+    'retry_attempts': 3,
+    'retry_delay': 1,  # seconds
+    'max_concurrent_queries': 8,  # queries in flight at once
+}
+
+# Create the process-wide Supabase client. Every cog shares this one client
+# (and therefore one keep-alive HTTP connection pool) through the bot's
+# repository instead of building its own.
+supabase: Client = create_client(
+    SUPABASE_URL,
+    SUPABASE_ANON_KEY,
+    options=ClientOptions(postgrest_client_timeout=CONNECTION_SETTINGS['timeout'])
+) if SUPABASE_URL and SUPABASE_ANON_KEY else None
 
 # Database table names
 TABLES = {
@@ -35,10 +50,3 @@ def validate_supabase_config():
         raise ValueError("SUPABASE_ANON_KEY environment variable is required")
     
     return True
-
-# Connection settings
-CONNECTION_SETTINGS = {
-    'timeout': 30,  # seconds
-    'retry_attempts': 3,
-    'retry_delay': 1,  # seconds
-}
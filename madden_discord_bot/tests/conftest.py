@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The bot imports its packages (cogs, utils, config) relative to madden_discord_bot/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,80 @@
+"""
+Local stand-in for the Twitch Helix "Get Streams" endpoint.
+"""
+import argparse
+
+from aiohttp import web
+
+# Helix rejects requests with more than 100 user_login parameters
+MAX_LOGINS_PER_REQUEST = 100
+
+
+class FakeHelix:
+    """Serves /helix/streams for whichever logins are marked live"""
+
+    def __init__(self, live=()):
+        self.live = {login.lower() for login in live}
+        self.requests = []  # user_login list of every accepted request
+        self.runner = None
+        self.url = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/helix/streams", self.get_streams)
+        self.app.router.add_post("/live", self.set_live)
+        self.app.router.add_delete("/live", self.set_offline)
+
+    async def get_streams(self, request):
+        logins = [login.lower() for login in request.query.getall("user_login", [])]
+        if len(logins) > MAX_LOGINS_PER_REQUEST:
+            return web.json_response(
+                {"error": "Bad Request", "status": 400, "message": "too many user_login parameters"},
+                status=400
+            )
+        self.requests.append(logins)
+
+        data = [
+            {
+                "id": str(index),
+                "user_login": login,
+                "user_name": login,
+                "type": "live",
+                "title": f"{login} playing Madden",
+                "game_name": "Madden NFL"
+            }
+            for index, login in enumerate(logins) if login in self.live
+        ]
+        return web.json_response({"data": data, "pagination": {}})
+
+    async def set_live(self, request):
+        self.live.update(login.lower() for login in request.query.getall("user_login", []))
+        return web.json_response({"live": sorted(self.live)})
+
+    async def set_offline(self, request):
+        self.live.difference_update(login.lower() for login in request.query.getall("user_login", []))
+        return web.json_response({"live": sorted(self.live)})
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start serving in the running loop and return the streams URL"""
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        port = self.runner.addresses[0][1]
+        self.url = f"http://{host}:{port}/helix/streams"
+        return self.url
+
+    async def close(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Twitch Helix streams endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--live", default="", help="comma-separated logins that start live")
+    args = parser.parse_args()
+
+    helix = FakeHelix(login for login in args.live.split(",") if login)
+    print(f"TWITCH_STREAMS_URL=http://{args.host}:{args.port}/helix/streams")
+    web.run_app(helix.app, host=args.host, port=args.port)
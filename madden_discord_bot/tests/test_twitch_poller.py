@@ -0,0 +1,90 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("discord")
+pytest.importorskip("aiohttp")
+pytest.importorskip("dotenv")
+
+from cogs import stream_manager  # noqa: E402
+from fake_helix import MAX_LOGINS_PER_REQUEST, FakeHelix  # noqa: E402
+
+STREAMER_COUNT = 150
+
+
+def make_cog(guild):
+    """Build a StreamManager for one guild whose members are all registered Twitch streamers"""
+    bot = SimpleNamespace(
+        db=None,
+        guilds=[guild],
+        get_guild=lambda guild_id: guild if guild_id == guild.id else None
+    )
+    cog = stream_manager.StreamManager(bot)
+    cog.streams_data["users"] = {str(user_id): f"https://twitch.tv/streamer{user_id}" for user_id in guild.members}
+    cog.registered_streamers = set(guild.members)
+
+    # Record poller-sourced starts without the points/announcement side effects
+    cog.started = []
+
+    async def handle_stream_start(member, source="presence", activity_name=None):
+        cog.started.append(member.id)
+        cog.active_streams[member.id] = {"started_at": time.time(), "guild_id": member.guild.id, "source": source}
+
+    cog.handle_stream_start = handle_stream_start
+    return cog
+
+
+def test_poller_batches_logins_and_tracks_start_and_stop(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    guild = SimpleNamespace(id=1, name="League", members={})
+    guild.get_member = guild.members.get
+    for user_id in range(1, STREAMER_COUNT + 1):
+        guild.members[user_id] = SimpleNamespace(id=user_id, display_name=f"Streamer {user_id}", guild=guild)
+
+    # Live users on both sides of the 100-login batch boundary
+    live_ids = {3, 99, 101, 150}
+
+    async def run():
+        helix = FakeHelix(f"streamer{user_id}" for user_id in live_ids)
+        monkeypatch.setattr(stream_manager, "TWITCH_STREAMS_URL", await helix.start())
+        cog = make_cog(guild)
+        try:
+            logins = [f"streamer{user_id}" for user_id in guild.members]
+            live = await cog.fetch_live_twitch_streams(logins)
+            assert set(live) == {f"streamer{user_id}" for user_id in live_ids}
+            assert [len(batch) for batch in helix.requests] == [MAX_LOGINS_PER_REQUEST, STREAMER_COUNT - MAX_LOGINS_PER_REQUEST]
+
+            # Start: every live login becomes a poller-sourced active stream
+            await cog.poll_twitch_streams()
+            assert sorted(cog.started) == sorted(live_ids)
+            assert all(cog.active_streams[user_id]["source"] == "twitch" for user_id in live_ids)
+            assert cog.twitch_poll_interval == stream_manager.TWITCH_POLL_MIN_INTERVAL
+
+            # Still live: no second start
+            await cog.poll_twitch_streams()
+            assert sorted(cog.started) == sorted(live_ids)
+
+            # Stop: a login that goes offline is ended and kept for the flap window
+            helix.live.discard("streamer101")
+            await cog.poll_twitch_streams()
+            assert 101 not in cog.active_streams
+            assert 101 in cog.recently_stopped
+            assert set(cog.active_streams) == live_ids - {101}
+
+            # Once everyone is offline and nothing changes, the poller slows down
+            helix.live.clear()
+            await cog.poll_twitch_streams()
+            assert not cog.active_streams
+            await cog.poll_twitch_streams()
+            assert cog.twitch_poll_interval == min(
+                stream_manager.TWITCH_POLL_MIN_INTERVAL * 2, stream_manager.TWITCH_POLL_MAX_INTERVAL
+            )
+        finally:
+            if cog.http_session:
+                await cog.http_session.close()
+            await helix.close()
+
+    asyncio.run(run())
@@ -0,0 +1,61 @@
+"""
+Per-channel queue for stream announcements.
+"""
+import asyncio
+import logging
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Discord allows at most 10 embeds per message
+MAX_EMBEDS_PER_MESSAGE = 10
+
+
+class AnnouncementQueue:
+    """Coalesces announcements per channel into multi-embed messages"""
+
+    def __init__(self, coalesce_window=3):
+        self.coalesce_window = coalesce_window
+        self._pending = {}  # {channel_id: (channel, [(content, embed)])}
+        self._workers = {}  # {channel_id: asyncio.Task}
+
+    def enqueue(self, channel, embed, content=None):
+        """Queue an embed for channel; it is sent after the coalesce window"""
+        _, items = self._pending.setdefault(channel.id, (channel, []))
+        items.append((content, embed))
+
+        worker = self._workers.get(channel.id)
+        if worker is None or worker.done():
+            self._workers[channel.id] = asyncio.create_task(self._run(channel.id))
+
+    async def _run(self, channel_id):
+        """Send everything queued for a channel once the burst settles"""
+        await asyncio.sleep(self.coalesce_window)
+        while channel_id in self._pending:
+            channel, items = self._pending.pop(channel_id)
+            for start in range(0, len(items), MAX_EMBEDS_PER_MESSAGE):
+                # Shielded so close() can't drop a batch that is already being sent
+                await asyncio.shield(self._send(channel, items[start:start + MAX_EMBEDS_PER_MESSAGE]))
+        self._workers.pop(channel_id, None)
+
+    async def _send(self, channel, items):
+        # Mentions are usually the same role for every item, so send each once
+        contents = list(dict.fromkeys(content for content, _ in items if content))
+        embeds = [embed for _, embed in items]
+        try:
+            await channel.send(content=" ".join(contents) or None, embeds=embeds)
+            logger.info(f"Posted {len(embeds)} stream announcement(s) in {channel.name}")
+        except discord.HTTPException as e:
+            logger.error(f"Error posting stream announcements in {channel.name}: {e}")
+
+    async def close(self):
+        """Send anything still queued without waiting out the window"""
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
+
+        pending, self._pending = self._pending, {}
+        for channel, items in pending.values():
+            for start in range(0, len(items), MAX_EMBEDS_PER_MESSAGE):
+                await self._send(channel, items[start:start + MAX_EMBEDS_PER_MESSAGE])
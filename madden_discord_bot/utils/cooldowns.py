@@ -0,0 +1,54 @@
+"""
+In-memory per-key cooldowns ordered by expiry.
+"""
+import heapq
+import time
+
+
+class CooldownTracker:
+    """Tracks when each key's cooldown ends, pruning expired entries from a min-heap"""
+
+    def __init__(self, duration):
+        self.duration = duration
+        self._expires = {}  # {key: wall-clock expiry}
+        self._heap = []  # [(expiry, key)], may hold stale entries for restarted keys
+
+    def start(self, key, now=None):
+        """Start (or restart) a key's cooldown"""
+        now = time.time() if now is None else now
+        expires_at = now + self.duration
+        self._expires[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+
+    def remaining(self, key, now=None):
+        """Seconds left on a key's cooldown, or 0 if it isn't cooling down"""
+        now = time.time() if now is None else now
+        self.prune(now)
+        expires_at = self._expires.get(key)
+        return max(0.0, expires_at - now) if expires_at else 0.0
+
+    def prune(self, now=None):
+        """Drop every cooldown that has ended"""
+        now = time.time() if now is None else now
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            if self._expires.get(key) == expires_at:
+                del self._expires[key]
+
+    def to_dict(self):
+        """Return the active cooldowns as {str(key): expiry} for checkpointing"""
+        self.prune()
+        return {str(key): expires_at for key, expires_at in self._expires.items()}
+
+    def load(self, data, key_type=int):
+        """Restore cooldowns from a checkpoint, skipping any that have ended"""
+        now = time.time()
+        self._expires = {
+            key_type(key): expires_at for key, expires_at in data.items() if expires_at > now
+        }
+        self._heap = [(expires_at, key) for key, expires_at in self._expires.items()]
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        self.prune()
+        return len(self._expires)
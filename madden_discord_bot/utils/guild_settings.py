@@ -0,0 +1,90 @@
+"""
+Per-guild settings backed by the server_settings table.
+"""
+import asyncio
+import logging
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# setting_key values used by the cogs
+STREAM_CHANNEL = "stream_channel_id"
+LEAGUE_ROLE = "league_role_id"
+COMMISH_ROLE = "commish_role_id"
+
+
+class GuildSettings:
+    """Cached, write-through view of server_settings keyed by guild"""
+
+    def __init__(self, db):
+        self.db = db
+        self._settings = {}  # {guild_id: {setting_key: setting_value}}
+        self._loading = {}  # {guild_id: asyncio.Task}
+        self._role_ids = {}  # {(guild_id, role_name): role_id} for roles found by name
+
+    async def load_guilds(self, guild_ids):
+        """Load every setting for the given guilds in one query, replacing cached values"""
+        guild_ids = [int(guild_id) for guild_id in guild_ids]
+        if not guild_ids:
+            return
+
+        loaded = {guild_id: {} for guild_id in guild_ids}
+        if self.db:
+            rows = await self.db.get_server_settings(guild_ids)
+            for row in rows:
+                loaded.setdefault(int(row["guild_id"]), {})[row["setting_key"]] = row["setting_value"]
+        self._settings.update(loaded)
+        logger.info(f"Loaded settings for {len(guild_ids)} guild(s)")
+
+    async def ensure_loaded(self, guild_id):
+        """Load a guild's settings unless they are already cached"""
+        guild_id = int(guild_id)
+        if guild_id in self._settings:
+            return
+
+        task = self._loading.get(guild_id)
+        if task is None:
+            task = asyncio.create_task(self.load_guilds([guild_id]))
+            self._loading[guild_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(guild_id, None))
+        try:
+            await task
+        except Exception as e:
+            logger.error(f"Error loading settings for guild {guild_id}: {e}")
+
+    def get(self, guild_id, setting_key, default=None):
+        """Return a cached setting, or default (starting a background load if the guild isn't loaded)"""
+        guild_id = int(guild_id)
+        settings = self._settings.get(guild_id)
+        if settings is None:
+            if guild_id not in self._loading:
+                try:
+                    asyncio.get_running_loop().create_task(self.ensure_loaded(guild_id))
+                except RuntimeError:
+                    pass
+            return default
+        return settings.get(setting_key, default)
+
+    async def set(self, guild_id, setting_key, setting_value):
+        """Write a setting to the table, then to the cache"""
+        guild_id = int(guild_id)
+        if self.db:
+            await self.db.upsert_server_setting(guild_id, setting_key, setting_value)
+        self._settings.setdefault(guild_id, {})[setting_key] = setting_value
+
+    def get_role(self, guild, setting_key, default_name):
+        """Return the role configured under setting_key, falling back to a role named default_name"""
+        role_id = self.get(guild.id, setting_key)
+        role = guild.get_role(int(role_id)) if role_id else None
+        if role:
+            return role
+
+        # Remember the ID of the role found by name so later lookups are O(1)
+        role_id = self._role_ids.get((guild.id, default_name))
+        role = guild.get_role(role_id) if role_id else None
+        if not role:
+            role = discord.utils.get(guild.roles, name=default_name)
+            if role:
+                self._role_ids[(guild.id, default_name)] = role.id
+        return role
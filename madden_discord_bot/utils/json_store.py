@@ -0,0 +1,93 @@
+"""
+JSON files kept in memory and written back in the background.
+"""
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class JsonStore:
+    """A dict backed by a JSON file, flushed atomically after changes settle"""
+
+    def __init__(self, path, default, flush_delay=5):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.data = self._load(default)
+        self._dirty = False
+        self._flush_task = None
+        self._write_lock = None
+
+    def _load(self, default):
+        """Read the file, falling back to a copy of default if it is missing or unreadable"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading {self.path}: {e}")
+        else:
+            # Create directory if it doesn't exist
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        return json.loads(json.dumps(default))
+
+    def mark_dirty(self):
+        """Schedule a flush after flush_delay; repeated calls share one write"""
+        self._dirty = True
+        if self._flush_task and not self._flush_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (e.g. a script); write straight away
+            self.flush_sync()
+            return
+        self._flush_task = loop.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        # Keep going while changes arrive during a write, since mark_dirty won't reschedule
+        while self._dirty:
+            await asyncio.sleep(self.flush_delay)
+            # Shielded so close() can't cancel a write that is already under way
+            await asyncio.shield(self.flush())
+
+    async def flush(self):
+        """Write pending changes off the event loop, one write at a time"""
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        async with self._write_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            payload = json.dumps(self.data, indent=2)
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._write, payload)
+            except Exception as e:
+                self._dirty = True
+                logger.error(f"Error saving {self.path}: {e}")
+
+    def flush_sync(self):
+        """Write pending changes immediately, blocking the caller"""
+        if not self._dirty:
+            return
+        try:
+            self._write(json.dumps(self.data, indent=2))
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"Error saving {self.path}: {e}")
+
+    async def close(self):
+        """Cancel any pending delayed flush and write outstanding changes"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+
+    def _write(self, payload):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
@@ -0,0 +1,79 @@
+"""
+In-memory points leaderboard kept in rank order.
+"""
+import time
+from bisect import bisect_left, bisect_right, insort
+
+
+class Leaderboard:
+    """Ranked snapshot of every user with points, ordered by (points DESC, id ASC)"""
+
+    def __init__(self):
+        self._points = {}  # {user_id: total_points}, only users with points > 0
+        self._ranked = []  # sorted [(-total_points, user_id)]
+        self._touched = {}  # {user_id: monotonic time of last local update}
+        self.loaded = False
+        self.loaded_at = None
+
+    @staticmethod
+    def _key(user_id, points):
+        return (-points, user_id)
+
+    def load(self, rows, started_at=None):
+        """Replace the snapshot with database rows, keeping users updated locally since started_at"""
+        fresh = {int(user_id): points for user_id, points in rows if points and points > 0}
+
+        if started_at is not None:
+            for user_id, touched_at in self._touched.items():
+                if touched_at >= started_at:
+                    points = self._points.get(user_id, 0)
+                    if points > 0:
+                        fresh[user_id] = points
+                    else:
+                        fresh.pop(user_id, None)
+
+        self._points = fresh
+        self._ranked = sorted(self._key(user_id, points) for user_id, points in fresh.items())
+        self._touched = {}
+        self.loaded = True
+        self.loaded_at = time.time()
+
+    def update(self, user_id, points):
+        """Record a user's new total, re-ranking them"""
+        user_id = int(user_id)
+        self._touched[user_id] = time.monotonic()
+
+        old_points = self._points.get(user_id)
+        if old_points == points:
+            return
+
+        if old_points is not None:
+            index = bisect_left(self._ranked, self._key(user_id, old_points))
+            if index < len(self._ranked) and self._ranked[index] == self._key(user_id, old_points):
+                del self._ranked[index]
+            del self._points[user_id]
+
+        if points and points > 0:
+            self._points[user_id] = points
+            insort(self._ranked, self._key(user_id, points))
+
+    def get(self, user_id):
+        """Return a user's total, or 0 if they have no points"""
+        return self._points.get(int(user_id), 0)
+
+    def page(self, limit, after=None, before=None):
+        """Return up to limit rows, in rank order, after or before a (points, user_id) cursor"""
+        if after is not None:
+            points, user_id = after
+            start = bisect_right(self._ranked, self._key(int(user_id), points))
+            entries = self._ranked[start:start + limit]
+        elif before is not None:
+            points, user_id = before
+            end = bisect_left(self._ranked, self._key(int(user_id), points))
+            entries = self._ranked[max(0, end - limit):end]
+        else:
+            entries = self._ranked[:limit]
+        return [(str(user_id), -neg_points) for neg_points, user_id in entries]
+
+    def __len__(self):
+        return len(self._ranked)
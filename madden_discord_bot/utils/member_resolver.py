@@ -0,0 +1,176 @@
+"""
+Batched lookup of guild members and their display names.
+"""
+import asyncio
+import logging
+
+from utils.cache import MISSING, TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Discord accepts at most 100 user IDs per gateway member request
+MEMBER_QUERY_CHUNK = 100
+
+
+class ExternalUser:
+    """Stand-in for a user who isn't a member of the guild, for the points system"""
+
+    def __init__(self, user_id, display_name, name):
+        self.id = user_id
+        self.display_name = display_name
+        self.name = name
+
+
+class MemberResolver:
+    """Resolves user IDs to members and display names for a guild, caching the results"""
+
+    def __init__(self, client, db, name_ttl=600, member_ttl=300, maxsize=4096):
+        self.client = client
+        self.db = db
+        self.name_cache = TTLCache(maxsize=maxsize, ttl=name_ttl)  # {(guild_id, user_id): name}
+        self.member_cache = TTLCache(maxsize=maxsize, ttl=member_ttl)  # {(guild_id, user_id): Member or None}
+
+    async def get_members(self, guild, user_ids, include_external=True):
+        """Return {user_id: member} for every ID that can be resolved, optionally including non-members"""
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+        members = {}
+        missing = []
+        non_members = []
+
+        for user_id in user_ids:
+            member = guild.get_member(user_id)
+            if member:
+                members[user_id] = member
+                continue
+
+            cached = self.member_cache.get((guild.id, user_id), MISSING)
+            if cached is MISSING:
+                missing.append(user_id)
+            elif cached is None:
+                non_members.append(user_id)
+            else:
+                members[user_id] = cached
+
+        if missing:
+            fetched = await self._query_members(guild, missing)
+            for user_id in missing:
+                member = fetched.get(user_id)
+                # Cache misses too, so repeat mentions of non-members stay local
+                self.member_cache.set((guild.id, user_id), member)
+                if member:
+                    members[user_id] = member
+                else:
+                    non_members.append(user_id)
+
+        if non_members and include_external:
+            members.update(await self._resolve_external_users(non_members))
+
+        logger.debug(f"Resolved {len(members)}/{len(user_ids)} user(s) in {guild.name} ({len(missing)} queried)")
+        return members
+
+    async def get_display_names(self, guild, user_ids):
+        """Return {user_id: display name} for every ID, falling back to User <id> for unknown users"""
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+        names = {}
+        missing = []
+
+        for user_id in user_ids:
+            cached_name = self.name_cache.get((guild.id, user_id))
+            if cached_name is not None:
+                names[user_id] = cached_name
+                continue
+
+            member = guild.get_member(user_id)
+            if member:
+                names[user_id] = self._remember(guild.id, user_id, member.display_name)
+            else:
+                missing.append(user_id)
+
+        if missing:
+            missing = await self._resolve_from_database(guild.id, missing, names)
+
+        if missing:
+            fetched = await self._query_members(guild, missing)
+            for user_id, member in fetched.items():
+                names[user_id] = self._remember(guild.id, user_id, member.display_name)
+            missing = [user_id for user_id in missing if user_id not in fetched]
+
+        for user_id in missing:
+            # Not in the guild and never stored; fall back to the client's user cache
+            user = self.client.get_user(user_id)
+            names[user_id] = user.display_name if user else f"User {user_id}"
+
+        return names
+
+    def invalidate(self, guild_id, user_id):
+        """Forget a resolved name and member (e.g. after a nickname change or leave)"""
+        self.name_cache.invalidate((guild_id, int(user_id)))
+        self.member_cache.invalidate((guild_id, int(user_id)))
+
+    def invalidate_user(self, user_id):
+        """Forget a user's resolved names in every guild (e.g. after a username change)"""
+        for guild in self.client.guilds:
+            self.invalidate(guild.id, user_id)
+
+    async def _resolve_external_users(self, user_ids):
+        """Build ExternalUser objects for non-members from cached or stored names"""
+        external = {}
+        unknown = []
+        for user_id in user_ids:
+            user = self.client.get_user(user_id)
+            if user:
+                external[user_id] = ExternalUser(user_id, user.display_name, user.name)
+            else:
+                unknown.append(user_id)
+
+        if unknown:
+            try:
+                rows = await self.db.get_users_by_ids(unknown, "id, display_name, username")
+            except Exception as e:
+                logger.error(f"Error loading stored users: {e}")
+                rows = []
+            for row in rows:
+                user_id = int(row["id"])
+                display_name = row.get("display_name") or row.get("username") or f"User {user_id}"
+                external[user_id] = ExternalUser(user_id, display_name, row.get("username") or display_name)
+
+        for user_id in user_ids:
+            if user_id not in external:
+                logger.warning(f"Could not resolve user {user_id}; not in guild and not a known user")
+        return external
+
+    def _remember(self, guild_id, user_id, name):
+        self.name_cache.set((guild_id, user_id), name)
+        return name
+
+    async def _resolve_from_database(self, guild_id, user_ids, names):
+        """Fill names from users.display_name and return the IDs still unresolved"""
+        try:
+            rows = await self.db.get_users_by_ids(user_ids, "id, display_name, username")
+        except Exception as e:
+            logger.error(f"Error loading stored display names: {e}")
+            return user_ids
+
+        for row in rows:
+            stored_name = row.get("display_name") or row.get("username")
+            if stored_name:
+                names[int(row["id"])] = self._remember(guild_id, int(row["id"]), stored_name)
+
+        return [user_id for user_id in user_ids if user_id not in names]
+
+    async def _query_members(self, guild, user_ids):
+        """Fetch members by ID over the gateway, 100 IDs per request"""
+        members = {}
+        for start in range(0, len(user_ids), MEMBER_QUERY_CHUNK):
+            chunk = user_ids[start:start + MEMBER_QUERY_CHUNK]
+            try:
+                results = await guild.query_members(user_ids=chunk, limit=len(chunk), cache=True)
+            except asyncio.TimeoutError:
+                logger.warning(f"Timed out querying {len(chunk)} member(s) in {guild.name}")
+                continue
+            except Exception as e:
+                logger.error(f"Error querying members in {guild.name}: {e}")
+                continue
+            for member in results:
+                members[member.id] = member
+        return members
@@ -0,0 +1,60 @@
+"""
+In-memory vote tallies for open GOTW polls.
+"""
+import time
+from collections import Counter
+
+
+class PollTallies:
+    """Per-team vote counters for open polls"""
+
+    def __init__(self):
+        self._counts = {}  # {poll_id: Counter({team_abbr: votes})}
+        self._touched = {}  # {poll_id: monotonic time of last local vote}
+
+    def load(self, poll_ids, counts, started_at=None):
+        """Replace the tallies for poll_ids with (poll_id, team_abbr, votes) rows from the database"""
+        fresh = {poll_id: Counter() for poll_id in poll_ids}
+        for row in counts:
+            if row["poll_id"] in fresh:
+                fresh[row["poll_id"]][row["team_abbr"]] = int(row["votes"])
+
+        # A poll voted on locally while the read ran may or may not include that vote,
+        # so it keeps its local counts until the next reconcile
+        if started_at is not None:
+            for poll_id, touched_at in self._touched.items():
+                if touched_at >= started_at and poll_id in fresh and poll_id in self._counts:
+                    fresh[poll_id] = self._counts[poll_id]
+
+        self._counts = fresh
+        self._touched = {}
+
+    def track(self, poll_id):
+        """Start tallying a poll (e.g. one just created)"""
+        self._counts.setdefault(poll_id, Counter())
+
+    def record(self, poll_id, team_abbr, previous_team=None):
+        """Record a vote, moving it from previous_team if the user had voted before"""
+        counts = self._counts.get(poll_id)
+        if counts is None or previous_team == team_abbr:
+            return
+        if previous_team is not None:
+            counts[previous_team] -= 1
+        counts[team_abbr] += 1
+        self._touched[poll_id] = time.monotonic()
+
+    def counts(self, poll_id, team1_abbr, team2_abbr):
+        """Return (team1 votes, team2 votes, total votes) for a tracked poll"""
+        counts = self._counts[poll_id]
+        return counts[team1_abbr], counts[team2_abbr], sum(counts.values())
+
+    def discard(self, poll_id):
+        """Stop tallying a poll"""
+        self._counts.pop(poll_id, None)
+        self._touched.pop(poll_id, None)
+
+    def __contains__(self, poll_id):
+        return poll_id in self._counts
+
+    def __len__(self):
+        return len(self._counts)
@@ -0,0 +1,396 @@
+"""
+Async data-access layer for the Franchise Player Bot.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from config.supabase_config import CONNECTION_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Failures where the request never reached PostgREST, so any query is safe to retry
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Error codes meaning a database function isn't deployed (PostgREST schema cache / Postgres)
+MISSING_FUNCTION_CODES = {"PGRST202", "42883"}
+
+
+def is_missing_function(error):
+    """True if an RPC error means the function doesn't exist, rather than a transient failure"""
+    return getattr(error, "code", None) in MISSING_FUNCTION_CODES
+
+
+class SupabaseRepository:
+    """Non-blocking wrappers around the Supabase tables used by the cogs"""
+
+    def __init__(self, client, settings=None):
+        self.client = client
+        settings = settings or CONNECTION_SETTINGS
+        self.retry_attempts = max(1, settings.get('retry_attempts', 3))
+        self.retry_delay = settings.get('retry_delay', 1)
+        self.max_concurrent_queries = settings.get('max_concurrent_queries', 8)
+        
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_queries,
+            thread_name_prefix="supabase"
+        )
+        self._semaphore = None
+        
+        # {function_name: True/False} for RPCs whose existence has been probed
+        self.rpc_available = {}
+
+    def _get_semaphore(self):
+        """Create the query semaphore lazily so it binds to the running loop"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_queries)
+        return self._semaphore
+
+    async def execute(self, query, idempotent=True):
+        """Run a built PostgREST query off the event loop and return the response"""
+        loop = asyncio.get_running_loop()
+        # Only connection failures are safe to retry for writes the server may already have applied
+        retry_on = httpx.TransportError if idempotent else CONNECT_ERRORS
+        
+        for attempt in range(1, self.retry_attempts + 1):
+            try:
+                async with self._get_semaphore():
+                    return await loop.run_in_executor(self._executor, query.execute)
+            except retry_on as e:
+                if attempt == self.retry_attempts:
+                    raise
+                logger.warning(f"Supabase query failed (attempt {attempt}/{self.retry_attempts}), retrying: {e}")
+                await asyncio.sleep(self.retry_delay * attempt)
+
+    async def probe_rpc(self, function_name, params):
+        """Record whether a read-only database function exists; returns None if the probe itself failed"""
+        try:
+            await self.execute(self.client.rpc(function_name, params))
+            available = True
+        except Exception as e:
+            if not is_missing_function(e):
+                logger.warning(f"Could not probe {function_name}: {e}")
+                return None
+            available = False
+        
+        if self.rpc_available.get(function_name) != available:
+            logger.info(f"RPC {function_name} is {'available' if available else 'not deployed'}")
+        self.rpc_available[function_name] = available
+        return available
+
+    def close(self):
+        """Stop the worker pool, letting in-flight queries finish"""
+        self._executor.shutdown(wait=False)
+
+    # ------------------------------------------------------------------ users
+
+    async def get_user(self, user_id, columns="*"):
+        """Get a single user row, or None if the user doesn't exist"""
+        result = await self.execute(
+            self.client.table("users").select(columns).eq("id", str(user_id))
+        )
+        return result.data[0] if result.data else None
+
+    async def get_users_by_ids(self, user_ids, columns="*"):
+        """Get the user rows for a list of IDs in one query"""
+        if not user_ids:
+            return []
+        result = await self.execute(
+            self.client.table("users").select(columns).in_("id", [str(user_id) for user_id in user_ids])
+        )
+        return result.data or []
+
+    async def create_user(self, user_data):
+        """Insert a new user row"""
+        result = await self.execute(self.client.table("users").insert(user_data), idempotent=False)
+        return result.data[0] if result.data else None
+
+    async def upsert_user(self, user_data):
+        """Insert or update a user row keyed by id"""
+        result = await self.execute(
+            self.client.table("users").upsert(user_data, on_conflict="id")
+        )
+        return result.data[0] if result.data else None
+
+    async def increment_user_points(self, user_id, delta, display_name=None, username=None):
+        """Atomically add delta to a user's total_points (never below zero), returning (old, new)"""
+        result = await self.execute(
+            self.client.rpc("increment_user_points", {
+                "user_id_param": int(user_id),
+                "delta_param": int(delta),
+                "display_name_param": display_name,
+                "username_param": username
+            }),
+            idempotent=False
+        )
+        row = result.data[0]
+        return row["old_points"], row["new_points"]
+
+    async def increment_users_points(self, users, delta):
+        """Apply one point change to (user_id, display_name, username) tuples, returning {user_id: (old, new)}"""
+        return await self._bulk_points_rpc("increment_users_points", users, {"delta_param": int(delta)})
+
+    async def clear_users_points(self, users):
+        """Reset (user_id, display_name, username) tuples to zero points, returning {user_id: (old, new)}"""
+        return await self._bulk_points_rpc("clear_users_points", users, {})
+
+    async def award_stream_points(self, user_id, points, cap=8, display_name=None, username=None):
+        """Atomically add stream points capped at cap (None for no cap), returning (added, stream, total)"""
+        result = await self.execute(
+            self.client.rpc("award_stream_points", {
+                "user_id_param": int(user_id),
+                "points_param": int(points),
+                "cap_param": cap,
+                "display_name_param": display_name,
+                "username_param": username
+            }),
+            idempotent=False
+        )
+        row = result.data[0]
+        return row["points_added"], row["stream_points"], row["total_points"]
+
+    async def _bulk_points_rpc(self, function_name, users, params):
+        """Call one of the bulk point functions and index the rows by user ID"""
+        params = dict(params)
+        params["user_ids_param"] = [int(user_id) for user_id, _, _ in users]
+        params["display_names_param"] = [display_name for _, display_name, _ in users]
+        params["usernames_param"] = [username for _, _, username in users]
+        
+        result = await self.execute(self.client.rpc(function_name, params), idempotent=False)
+        return {
+            int(row["user_id"]): (row["old_points"], row["new_points"])
+            for row in result.data or []
+        }
+
+    async def get_leaderboard_page(self, limit, after=None, before=None):
+        """Get one page of users with points, keyset-paginated on (total_points DESC, id ASC)"""
+        query = self.client.table("users").select("id, total_points").gt("total_points", 0)
+        
+        if after is not None:
+            points, user_id = after
+            query = (
+                query.or_(f"total_points.lt.{int(points)},and(total_points.eq.{int(points)},id.gt.{int(user_id)})")
+                .order("total_points", desc=True)
+                .order("id")
+            )
+        elif before is not None:
+            # Walk backwards from the cursor, then flip back into rank order
+            points, user_id = before
+            query = (
+                query.or_(f"total_points.gt.{int(points)},and(total_points.eq.{int(points)},id.lt.{int(user_id)})")
+                .order("total_points")
+                .order("id", desc=True)
+            )
+        else:
+            query = query.order("total_points", desc=True).order("id")
+        
+        result = await self.execute(query.limit(limit))
+        rows = result.data or []
+        if before is not None:
+            rows.reverse()
+        return rows
+
+    async def get_all_user_points(self, page_size=1000):
+        """Get id and total_points for every user with points, paging past PostgREST's row cap"""
+        rows = []
+        start = 0
+        while True:
+            result = await self.execute(
+                self.client.table("users")
+                .select("id, total_points")
+                .gt("total_points", 0)
+                .order("total_points", desc=True)
+                .order("id")
+                .range(start, start + page_size - 1)
+            )
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            start += page_size
+
+    async def count_users_with_points(self):
+        """Count users with more than zero points"""
+        result = await self.execute(
+            self.client.table("users").select("id", count="exact").gt("total_points", 0)
+        )
+        return result.count or 0
+
+    # -------------------------------------------------------- server_settings
+
+    async def get_server_settings(self, guild_ids):
+        """Get every setting row for a list of guilds in one query"""
+        if not guild_ids:
+            return []
+        result = await self.execute(
+            self.client.table("server_settings")
+            .select("guild_id, setting_key, setting_value")
+            .in_("guild_id", [int(guild_id) for guild_id in guild_ids])
+        )
+        return result.data or []
+
+    async def upsert_server_setting(self, guild_id, setting_key, setting_value):
+        """Insert or update one guild setting keyed by (guild_id, setting_key)"""
+        result = await self.execute(
+            self.client.table("server_settings").upsert({
+                "guild_id": int(guild_id),
+                "setting_key": setting_key,
+                "setting_value": setting_value
+            }, on_conflict="guild_id,setting_key")
+        )
+        return result.data[0] if result.data else None
+
+    # -------------------------------------------------------- stream_sessions
+
+    async def insert_stream_sessions(self, sessions):
+        """Write a batch of stream sessions, skipping rows (by client-generated id) already stored"""
+        if not sessions:
+            return []
+        result = await self.execute(
+            self.client.table("stream_sessions").upsert(sessions, on_conflict="id", ignore_duplicates=True)
+        )
+        return result.data or []
+
+    # ----------------------------------------------------------- player_cards
+
+    async def get_player_cards(self, user_id):
+        """Get every player card owned by a user"""
+        result = await self.execute(
+            self.client.table("player_cards").select("*").eq("user_id", user_id)
+        )
+        return result.data or []
+
+    async def get_player_card(self, user_id, position):
+        """Get a user's card for a specific position/player key"""
+        result = await self.execute(
+            self.client.table("player_cards").select("*").eq("user_id", user_id).eq("position", position)
+        )
+        return result.data[0] if result.data else None
+
+    async def insert_player_card(self, card_data):
+        """Insert a new player card"""
+        result = await self.execute(self.client.table("player_cards").insert(card_data), idempotent=False)
+        return result.data[0] if result.data else None
+
+    async def update_player_card_attributes(self, card_id, attributes):
+        """Replace the attributes of an existing card"""
+        result = await self.execute(
+            self.client.table("player_cards").update({"attributes": attributes}).eq("id", card_id)
+        )
+        return result.data[0] if result.data else None
+
+    async def delete_player_cards(self, user_id):
+        """Delete all of a user's cards and return the deleted rows"""
+        result = await self.execute(
+            self.client.table("player_cards").delete().eq("user_id", user_id)
+        )
+        return result.data or []
+
+    # ------------------------------------------------------------ team_claims
+
+    async def get_team_claim_by_user(self, user_id, columns="*"):
+        """Get the claim held by a user"""
+        result = await self.execute(
+            self.client.table("team_claims").select(columns).eq("user_id", str(user_id))
+        )
+        return result.data[0] if result.data else None
+
+    async def get_team_claim_by_team(self, team_abbrev, columns="*"):
+        """Get the claim on a team"""
+        result = await self.execute(
+            self.client.table("team_claims").select(columns).eq("team_abbreviation", team_abbrev.upper())
+        )
+        return result.data[0] if result.data else None
+
+    async def list_team_claims(self, columns="*"):
+        """Get every team claim"""
+        result = await self.execute(self.client.table("team_claims").select(columns))
+        return result.data or []
+
+    async def delete_team_claims_by_user(self, user_id):
+        """Remove any claim held by a user"""
+        await self.execute(
+            self.client.table("team_claims").delete().eq("user_id", str(user_id))
+        )
+
+    async def delete_team_claim_by_team(self, team_abbrev):
+        """Remove any claim on a team"""
+        await self.execute(
+            self.client.table("team_claims").delete().eq("team_abbreviation", team_abbrev.upper())
+        )
+
+    async def insert_team_claim(self, claim_data):
+        """Insert a new team claim"""
+        result = await self.execute(self.client.table("team_claims").insert(claim_data), idempotent=False)
+        return result.data[0] if result.data else None
+
+    # ------------------------------------------------------------- gotw_polls
+
+    async def insert_poll(self, poll_data):
+        """Insert a new GOTW poll"""
+        result = await self.execute(self.client.table("gotw_polls").insert(poll_data), idempotent=False)
+        return result.data[0] if result.data else None
+
+    async def get_poll(self, poll_id, columns="*"):
+        """Get a GOTW poll row"""
+        result = await self.execute(
+            self.client.table("gotw_polls").select(columns).eq("id", poll_id)
+        )
+        return result.data[0] if result.data else None
+
+    async def update_poll(self, poll_id, poll_data):
+        """Update fields on a GOTW poll"""
+        result = await self.execute(
+            self.client.table("gotw_polls").update(poll_data).eq("id", poll_id)
+        )
+        return result.data[0] if result.data else None
+
+    async def get_open_polls(self):
+        """Get every poll without a declared winner"""
+        result = await self.execute(
+            self.client.table("gotw_polls").select("*").eq("winner_declared", False)
+        )
+        return result.data or []
+
+    async def get_open_poll_vote_counts(self):
+        """Get (poll_id, team_abbr, votes) rows for open polls, counted by the database"""
+        result = await self.execute(self.client.rpc("get_open_poll_vote_counts", {}))
+        return result.data or []
+
+    async def get_poll_with_votes(self, poll_id):
+        """Call the get_poll_with_votes function for a poll"""
+        result = await self.execute(
+            self.client.rpc("get_poll_with_votes", {"poll_id_param": poll_id})
+        )
+        return result.data[0] if result.data else None
+
+    # ------------------------------------------------------------- gotw_votes
+
+    async def get_votes(self, poll_id, team_abbr=None, columns="team_abbr"):
+        """Get votes for a poll, optionally only those for one team"""
+        query = self.client.table("gotw_votes").select(columns).eq("poll_id", poll_id)
+        if team_abbr:
+            query = query.eq("team_abbr", team_abbr)
+        result = await self.execute(query)
+        return result.data or []
+
+    async def record_vote(self, poll_id, user_id, team_abbr):
+        """Record or change a user's vote, returning the team they voted for before (or None)"""
+        result = await self.execute(
+            self.client.rpc("record_gotw_vote", {
+                "poll_id_param": poll_id,
+                "user_id_param": int(user_id),
+                "team_abbr_param": team_abbr
+            }),
+            idempotent=False
+        )
+        return result.data or None
+
+    async def upsert_vote(self, vote_data):
+        """Insert or replace a user's vote, keyed by (poll_id, user_id)"""
+        result = await self.execute(
+            self.client.table("gotw_votes").upsert(vote_data, on_conflict="poll_id,user_id")
+        )
+        return result.data[0] if result.data else None